@@ -0,0 +1,123 @@
+"""Synthetic MIDI corpus generator for the Pianoblox benchmarks.
+
+Every file is generated from a fixed seed so that two runs on the same
+machine parse exactly the same bytes.
+"""
+import argparse
+import os
+import random
+
+# --- Corpus Specifications ---
+# name: (format, tracks, notes_per_track, max_chord, tempo_changes, running_status, note_off)
+CORPUS_SPECS = {
+    "format0_small":       (0, 1, 500, 1, 0, False, "note_off"),
+    "format0_running":     (0, 1, 4000, 3, 4, True, "velocity_zero"),
+    "format1_many_tracks": (1, 32, 400, 2, 8, True, "note_off"),
+    "format1_dense_chords": (1, 4, 1500, 10, 2, False, "velocity_zero"),
+    "format1_tempo_heavy": (1, 8, 1000, 3, 200, True, "note_off"),
+    "format1_large":       (1, 16, 2500, 4, 16, True, "velocity_zero"),
+    "format1_32_tracks":   (1, 32, 2500, 3, 16, True, "velocity_zero"),
+}
+
+DIVISION = 480
+
+def encode_vlq(value):
+    """Encode an integer as a MIDI variable-length quantity."""
+    out = [value & 0x7F]
+    value >>= 7
+    while value:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    return bytes(reversed(out))
+
+def build_chunk(chunk_id, payload):
+    """Wrap a payload in a chunk header."""
+    return chunk_id + len(payload).to_bytes(4, "big") + payload
+
+def build_track(events, running_status=False):
+    """Serialize (absolute_tick, status, data_bytes) events into an MTrk chunk."""
+    payload = bytearray()
+    last_tick = 0
+    last_status = None
+    for tick, status, data in sorted(events, key=lambda e: (e[0], e[1] == 0xFF)):
+        payload += encode_vlq(tick - last_tick)
+        last_tick = tick
+        if status == 0xFF:
+            payload += bytes([0xFF]) + data[:1] + encode_vlq(len(data) - 1) + data[1:]
+            last_status = None
+        else:
+            if not (running_status and status == last_status):
+                payload.append(status)
+            payload += data
+            last_status = status
+    payload += b"\x00\xFF\x2F\x00"
+    return build_chunk(b"MTrk", bytes(payload))
+
+def tempo_event(tick, bpm):
+    """Build a Set Tempo meta event."""
+    return (tick, 0xFF, bytes([0x51]) + round(60000000 / bpm).to_bytes(3, "big"))
+
+def text_event(tick, meta_type, text):
+    """Build a text meta event such as a track name (0x03) or copyright notice (0x02)."""
+    return (tick, 0xFF, bytes([meta_type]) + text.encode("latin-1"))
+
+def note_events(rng, channel, count, max_chord, note_off):
+    """Generate note on/off events for one track and return them with the last tick used."""
+    events = []
+    tick = 0
+    for _ in range(count):
+        tick += rng.choice((0, DIVISION // 8, DIVISION // 4, DIVISION // 2, DIVISION))
+        length = rng.choice((DIVISION // 8, DIVISION // 4, DIVISION // 2))
+        for key in rng.sample(range(36, 96), rng.randint(1, max_chord)):
+            events.append((tick, 0x90 | channel, bytes([key, rng.randint(40, 120)])))
+            if note_off == "velocity_zero":
+                events.append((tick + length, 0x90 | channel, bytes([key, 0])))
+            else:
+                events.append((tick + length, 0x80 | channel, bytes([key, 64])))
+    return events, tick
+
+def generate_midi(fmt, tracks, notes_per_track, max_chord, tempo_changes,
+                  running_status=False, note_off="note_off", seed=0):
+    """Generate the bytes of a synthetic Standard MIDI File."""
+    rng = random.Random(seed)
+    track_events = []
+    last_tick = 0
+    for t in range(tracks):
+        events, end = note_events(rng, t % 16 if t % 16 != 9 else 0, notes_per_track, max_chord, note_off)
+        track_events.append([text_event(0, 0x03, f"Track {t + 1}")] + events)
+        last_tick = max(last_tick, end)
+
+    tempos = [text_event(0, 0x03, f"Synthetic {fmt}-{tracks}"), text_event(0, 0x02, "Public Domain"), tempo_event(0, 120)]
+    for i in range(tempo_changes):
+        tempos.append(tempo_event(rng.randint(1, max(1, last_tick)), rng.randint(60, 200)))
+
+    if fmt == 0:
+        merged = tempos + [e for events in track_events for e in events]
+        chunks = [build_track(merged, running_status)]
+    else:
+        chunks = [build_track(tempos, running_status)]
+        chunks += [build_track(events, running_status) for events in track_events]
+
+    header = build_chunk(b"MThd", fmt.to_bytes(2, "big") + len(chunks).to_bytes(2, "big") + DIVISION.to_bytes(2, "big"))
+    return header + b"".join(chunks)
+
+def write_corpus(directory, names=None, seed=0):
+    """Write the corpus files into a directory and return {name: path}."""
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for name, spec in CORPUS_SPECS.items():
+        if names and name not in names:
+            continue
+        path = os.path.join(directory, name + ".mid")
+        with open(path, "wb") as f:
+            f.write(generate_midi(*spec, seed=seed))
+        paths[name] = path
+    return paths
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the synthetic MIDI benchmark corpus.")
+    parser.add_argument("directory", help="Output directory")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for name, path in write_corpus(args.directory, seed=args.seed).items():
+        print(f"{name}: {path} ({os.path.getsize(path)} bytes)")
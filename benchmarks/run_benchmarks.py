@@ -0,0 +1,634 @@
+"""Benchmark suite for the Pianoblox MIDI parser and player.
+
+Usage:
+    python benchmarks/run_benchmarks.py                  # run and compare to baselines.json
+    python benchmarks/run_benchmarks.py --save-baseline  # run and store new baselines
+    python benchmarks/run_benchmarks.py --only parse     # run cases whose name contains "parse"
+    python benchmarks/run_benchmarks.py --only check/    # run only the correctness checks
+"""
+import argparse
+import bz2
+import contextlib
+import gzip
+import io
+import json
+import lzma
+import os
+import platform
+import random
+import shutil
+import socket
+import statistics
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+# The benchmarks never send real keystrokes, so no display server is needed.
+os.environ.setdefault("PYNPUT_BACKEND", "dummy")
+
+import pianoblox
+import midi_corpus
+
+BASELINE_FILE = os.path.join(BENCH_DIR, "baselines.json")
+JITTER_CASES = ("jitter_mean/scheduler", "jitter_p95/scheduler", "jitter_max/scheduler")
+GC_LOAD_CASES = ("jitter_mean/gc_load", "jitter_p95/gc_load", "jitter_max/gc_load")
+LOW_JITTER_CASES = ("jitter_mean/low_jitter", "jitter_p95/low_jitter", "jitter_max/low_jitter")
+HOTKEY_CASES = ("hotkey_latency_mean/control_loop", "hotkey_latency_max/control_loop")
+STRESS_CASE = "player_stress/toggle"
+
+# --- Fake Key Output ---
+class FakeKeyController:
+    """Records key presses and releases instead of sending them to the OS."""
+
+    def __init__(self):
+        self.events = []
+        self.threads = []
+
+    def press(self, key):
+        self.events.append((time.perf_counter(), "press", key))
+        self.threads.append(threading.current_thread().name)
+
+    def release(self, key):
+        self.events.append((time.perf_counter(), "release", key))
+
+    def press_times(self):
+        return [t for t, kind, key in self.events if kind == "press" and key != pianoblox.keyboard.Key.shift]
+
+# --- Helpers ---
+def quiet():
+    """Silence the [Debug] prints of the code under test."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+def time_call(func, repeat):
+    """Run func repeat times and return the list of wall-clock durations."""
+    durations = []
+    for _ in range(repeat):
+        with quiet():
+            start = time.perf_counter()
+            func()
+            durations.append(time.perf_counter() - start)
+    return durations
+
+def load_info_tuple(midi, work_dir):
+    """Build the playback infoTuple the same way load_midi_file does."""
+    with quiet():
+        midi.save_song(os.path.join(pianoblox.get_session_directory(), "song.json"))
+        info = pianoblox.process_midi_file()
+    return info
+
+def parse_copy(info):
+    """Run parse_midi_info on a fresh copy of the note list."""
+    return pianoblox.parse_midi_info([info[0], info[1], [list(n) for n in info[2]], []])
+
+def load_synthetic_song(notes, step):
+    """Load a song of single keys step seconds apart into the player and return its compiled notes."""
+    song = [[0.0, "tempo=60"]] + [[i * step, "qwertyuiop"[i % 10]] for i in range(notes)]
+    info = [1.0, 0.0, song, []]
+    info[2] = pianoblox.parse_midi_info(info)
+    pianoblox.player.load(info)
+    pianoblox.set_playback_speed(1.0)
+    return info[2]
+
+# --- Benchmark Cases ---
+def bench_parsing(paths, work_dir, repeat, only=""):
+    results = {}
+
+    def run(case, func):
+        if only in case:
+            results[case] = time_call(func, repeat)
+
+    for name, path in paths.items():
+        with quiet():
+            midi = pianoblox.MidiFile(path)
+        raw_notes = [list(n) for n in midi.notes]
+
+        run(f"parse/{name}", lambda: pianoblox.MidiFile(path))
+
+        with open(path, "rb") as f:
+            data = f.read()
+        run(f"parse_buffer/{name}", lambda: pianoblox.MidiFile(data))
+
+        def clean():
+            midi.notes = [list(n) for n in raw_notes]
+            midi.clean_notes()
+        run(f"clean_notes/{name}", clean)
+
+        info = load_info_tuple(midi, work_dir)
+        run(f"parse_midi_info/{name}", lambda: parse_copy(info))
+
+        compiled = parse_copy(info)
+        run(f"analyze_song/{name}", lambda: pianoblox.analyze_song(compiled))
+        run(f"rate_limit/{name}", lambda: pianoblox.limit_keystroke_rate(compiled, 40, speed=2.0))
+
+        sheet_data = midi.sheet_notes()
+        run(f"format_sheet/{name}", lambda: pianoblox.format_sheet(sheet_data))
+
+        sheet_file = os.path.join(work_dir, "sheet.json")
+        run(f"save_sheet/{name}", lambda: midi.save_sheet(sheet_file))
+
+        run(f"get_midi_info/{name}", lambda: uncached_midi_info(path))
+    return results
+
+def uncached_midi_info(path):
+    """Time get_midi_info on a cold cache so the full parse and analysis is measured."""
+    pianoblox.analytics_cache.clear()
+    pianoblox.get_song_store().clear()
+    return pianoblox.get_midi_info(path)
+
+def churn_heap(live):
+    """Allocate and drop container objects the way a busy UI thread does, triggering full GC passes."""
+    live.append([[i, {"k": i}] for i in range(2000)])
+    if len(live) > 200:
+        live.pop(0)
+
+def parse_snapshot(midi):
+    return (midi.notes, midi.text_events, midi.pitch_histogram, midi.transposition, midi.tempo)
+
+def bench_parallel_parse(paths, repeat, only=""):
+    """Time sequential against process-pool track decoding on multi-track files and check they agree."""
+    results = {}
+    for name, path in paths.items():
+        sequential_case, parallel_case = f"parse_sequential/{name}", f"parse_parallel/{name}"
+        if only not in sequential_case and only not in parallel_case:
+            continue
+        with quiet():
+            midi = pianoblox.MidiFile(path, parallel=False)
+        if midi.format != 1 or midi.track_index + 1 < pianoblox.PARALLEL_PARSE_MIN_TRACKS:
+            continue
+        # The first parallel parse also starts the worker processes; keep that out of the timings.
+        with quiet():
+            parallel = pianoblox.MidiFile(path, parallel=True)
+        if parse_snapshot(parallel) != parse_snapshot(midi):
+            raise AssertionError(f"{name}: parallel decoding differs from sequential decoding")
+        results[sequential_case] = time_call(lambda: pianoblox.MidiFile(path, parallel=False), repeat)
+        results[parallel_case] = time_call(lambda: pianoblox.MidiFile(path, parallel=True), repeat)
+    pianoblox.shutdown_parse_pool()
+    return results
+
+def bench_scheduler_jitter(work_dir, notes=300, step=0.005, cases=JITTER_CASES, gc_load=False, low_jitter=False):
+    """Play a synthetic song against a fake key output and measure onset drift in seconds.
+
+    With gc_load the main thread churns a large heap while the song plays,
+    and low_jitter turns on pianoblox.LOW_JITTER_MODE for the run.
+    """
+    expected = []
+    elapsed = 0.0
+    for delay, keys in load_synthetic_song(notes, step):
+        expected.append(elapsed)
+        elapsed += delay
+
+    fake = FakeKeyController()
+    pianoblox.kb_controller = fake
+    pianoblox.LOW_JITTER_MODE = low_jitter
+    live = []
+    try:
+        with quiet():
+            pianoblox.toggle_autoplay()
+            while pianoblox.player.playing:
+                if gc_load:
+                    churn_heap(live)
+                    time.sleep(0.001)
+                else:
+                    time.sleep(0.01)
+    finally:
+        pianoblox.LOW_JITTER_MODE = False
+
+    actual = fake.press_times()
+    count = min(len(actual), len(expected))
+    errors = [abs((actual[i] - actual[0]) - expected[i]) for i in range(count)]
+    errors.sort()
+    values = (statistics.mean(errors), errors[int(0.95 * (len(errors) - 1))], errors[-1])
+    return {case: [value] for case, value in zip(cases, values)}
+
+def bench_player_stress(toggles=300, seed=0):
+    """Toggle playback at random short intervals and count overlapping playback chains.
+
+    Returns the toggle time and fails if presses ever come from a second
+    thread before the first one stopped, or if more than one playback
+    thread outlives the run.
+    """
+    rng = random.Random(seed)
+    load_synthetic_song(2000, 0.001)
+    fake = FakeKeyController()
+    pianoblox.kb_controller = fake
+    start = time.perf_counter()
+    with quiet():
+        for _ in range(toggles):
+            pianoblox.toggle_autoplay()
+            time.sleep(rng.choice((0, 0, 0.0005, 0.002, 0.005)))
+            # Seeking while stopped and playing must not start a chain either.
+            if rng.random() < 0.2:
+                pianoblox.seek_to_index(rng.randrange(2000))
+        elapsed = time.perf_counter() - start
+        pianoblox.player.stop()
+        time.sleep(0.05)
+
+    # Each chain is one thread; a switch back to an earlier thread means two chains overlapped.
+    finished, current = set(), None
+    for name in fake.threads:
+        if name != current:
+            if name in finished:
+                raise AssertionError("two playback chains pressed keys at the same time")
+            if current is not None:
+                finished.add(current)
+            current = name
+    alive = [t for t in threading.enumerate() if t.name.startswith("playback-")]
+    if len(alive) > 1:
+        raise AssertionError(f"{len(alive)} playback threads still alive after stopping")
+    print(f"player stress: {toggles} toggles, {len(finished) + (current is not None)} chains, "
+          f"{len(fake.press_times())} presses, {len(alive)} thread(s) alive")
+    return {STRESS_CASE: [elapsed / toggles]}
+
+def bench_hotkey_latency(presses=200, interval=0.002):
+    """Feed rewind hotkeys through the listener callback and report the queue-to-action delay."""
+    pianoblox.start_control_loop()
+    pianoblox.hotkey_latencies.clear()
+    with quiet():
+        for _ in range(presses):
+            pianoblox.on_key_press(pianoblox.keyboard.Key.home)
+            time.sleep(interval)
+        while len(pianoblox.hotkey_latencies) < presses:
+            time.sleep(0.01)
+    stats = pianoblox.hotkey_latency_stats()
+    return {case: [stats[key]] for case, key in zip(HOTKEY_CASES, ("mean", "max"))}
+
+def bench_control_server(work_dir, repeat, only="", requests=200):
+    """Time status round trips through the control socket server."""
+    case = "control_rtt/status"
+    if only not in case:
+        return {}
+    with quiet():
+        server = pianoblox.ControlServer(os.path.join(work_dir, "control.sock")).start()
+    try:
+        pianoblox.send_control_command(server.path, "status")
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(requests):
+                pianoblox.send_control_command(server.path, "status")
+            durations.append((time.perf_counter() - start) / requests)
+    finally:
+        server.stop()
+    return {case: durations}
+
+def bench_archive_import(paths, work_dir, repeat, only="", copies=20):
+    """Time importing a MIDI pack from zip and tar.gz archives into an empty library.
+
+    Every corpus file appears copies times under different names, so most
+    members are skipped as duplicates after hashing.
+    """
+    archives = {"zip": os.path.join(work_dir, "pack.zip"), "tar_gz": os.path.join(work_dir, "pack.tar.gz")}
+    results = {}
+    for kind, archive_path in archives.items():
+        case = f"import_archive/{kind}"
+        if only not in case:
+            continue
+        if kind == "zip":
+            with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as archive:
+                for i in range(copies):
+                    for name, path in paths.items():
+                        archive.write(path, f"pack/{i}/{name}.mid")
+        else:
+            with tarfile.open(archive_path, "w:gz") as archive:
+                for i in range(copies):
+                    for name, path in paths.items():
+                        archive.add(path, f"pack/{i}/{name}.mid")
+
+        def run():
+            library_dir = tempfile.mkdtemp(dir=work_dir)
+            library = pianoblox.MidiLibrary(library_dir)
+            library.scan()
+            index = pianoblox.MidiSearchIndex(os.path.join(library_dir, "index.json"))
+            job = pianoblox.MidiImportJob([archive_path], library, index)
+            job.run()
+            if job.imported != len(paths) or job.duplicates != len(paths) * (copies - 1):
+                raise AssertionError(f"{case}: {job.summary()} {job.errors[:3]}")
+        results[case] = time_call(run, repeat)
+    return results
+
+def bench_search_index(repeat, only="", files=50000):
+    """Time warm ranked queries against a synthetic library index."""
+    rng = random.Random(0)
+    words = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 9))) for _ in range(5000)]
+    index = pianoblox.MidiSearchIndex()
+    with index.lock:
+        for i in range(files):
+            name = " ".join(rng.sample(words, 3)) + f" {i}.mid"
+            index._insert(name, {"mtime": 0, "size": 0, "text": " | ".join(rng.sample(words, 4)), "tracks": []})
+
+    results = {}
+    queries = {"one_word": words[7], "two_words": words[11] + " " + words[12], "typo": words[20][:-1] + "q"}
+    for case, query in queries.items():
+        if only in f"search_index/{case}":
+            index.query(query)
+            results[f"search_index/{case}"] = time_call(lambda: index.query(query), repeat)
+    return results
+
+# --- Checks ---
+def check_tempo_map(work_dir):
+    """A song that changes tempo lasts as long as its whole tempo map says."""
+    division = midi_corpus.DIVISION
+    events = [midi_corpus.tempo_event(0, 120), midi_corpus.tempo_event(division, 30)]
+    for beat in range(8):
+        events.append((beat * division, 0x90, bytes([60 + beat, 100])))
+        events.append(((beat + 1) * division, 0x80, bytes([60 + beat, 64])))
+    header = midi_corpus.build_chunk(b"MThd", (0).to_bytes(2, "big") + (1).to_bytes(2, "big") + division.to_bytes(2, "big"))
+    path = os.path.join(work_dir, "tempo_map.mid")
+    with open(path, "wb") as f:
+        f.write(header + midi_corpus.build_track(events))
+
+    # 1 beat at 120 bpm, then 7 beats at 30 bpm up to the last note.
+    with quiet():
+        info = pianoblox.get_midi_info(path)
+    if info["status"] != "success" or abs(info["duration_seconds"] - 14.5) > 1e-6:
+        raise AssertionError(f"tempo_map: expected 14.5 s, got {info}")
+
+def check_compressed_streams(work_dir):
+    """gzip, bz2 and lzma streams have a fileno() but must be read, not memory-mapped."""
+    path = midi_corpus.write_corpus(os.path.join(work_dir, "streams"), ["format1_many_tracks"])["format1_many_tracks"]
+    with quiet():
+        expected = parse_snapshot(pianoblox.MidiFile(path, parallel=False))
+    for module in (gzip, bz2, lzma):
+        packed = path + "." + module.__name__
+        with open(path, "rb") as src, module.open(packed, "wb") as dest:
+            dest.write(src.read())
+        with module.open(packed, "rb") as stream, quiet():
+            midi = pianoblox.MidiFile(stream, parallel=False)
+        if not midi.success or parse_snapshot(midi) != expected:
+            raise AssertionError(f"compressed_streams: {module.__name__} stream parsed differently")
+
+def check_keystroke_limit(work_dir):
+    """A dense song is played unthinned at 1x and only thinned once the speed passes the limit."""
+    path = midi_corpus.write_corpus(os.path.join(work_dir, "limit"), ["format1_dense_chords"])["format1_dense_chords"]
+    with quiet():
+        midi = pianoblox.MidiFile(path, parallel=False)
+        info = pianoblox.compile_song(midi.notes)
+        info[2] = pianoblox.parse_midi_info(info)
+        compiled = [list(note) for note in info[2]]
+        pianoblox.player.load(info)
+        try:
+            pianoblox.set_playback_speed(1.0)
+            pianoblox.apply_keystroke_limit()
+            at_normal_speed = [list(note) for note in pianoblox.player.info[2]]
+            pianoblox.set_playback_speed(3.0)
+            pianoblox.apply_keystroke_limit()
+            at_high_speed = pianoblox.player.info[2]
+        finally:
+            pianoblox.set_playback_speed(1.0)
+            pianoblox.apply_keystroke_limit()
+    if at_normal_speed != compiled:
+        raise AssertionError("keystroke_limit: the song was thinned at 1x speed")
+    if sum(map(len, (keys for delay, keys in at_high_speed))) >= sum(map(len, (keys for delay, keys in compiled))):
+        raise AssertionError("keystroke_limit: the song was not thinned at 3x speed")
+
+def check_search_index_files(work_dir):
+    """Concurrent saves leave one complete index file, and a load never replaces newer documents."""
+    index_file = os.path.join(work_dir, "index_check", "search_index.json")
+    os.makedirs(os.path.dirname(index_file))
+    index = pianoblox.MidiSearchIndex(index_file)
+    doc = {"mtime": 0, "size": 0, "text": "", "tracks": []}
+
+    def add_and_save(worker):
+        for i in range(20):
+            index.add_document(f"song {worker} {i}.mid", dict(doc))
+            index.save()
+    threads = [threading.Thread(target=add_and_save, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    index.save()
+    with open(index_file, "r", encoding="utf-8") as f:
+        saved = json.load(f)["docs"]
+    if len(saved) != 80 or os.listdir(os.path.dirname(index_file)) != ["search_index.json"]:
+        raise AssertionError(f"search_index_files: {len(saved)} documents saved, files {os.listdir(os.path.dirname(index_file))}")
+
+    reloaded = pianoblox.MidiSearchIndex(index_file)
+    reloaded.add_document("song 0 0.mid", dict(doc, mtime=1))
+    reloaded.load()
+    if len(reloaded.docs) != 80 or reloaded.docs["song 0 0.mid"]["mtime"] != 1:
+        raise AssertionError("search_index_files: load replaced a newer document")
+
+def check_import_dedup(work_dir):
+    """Imports only hash library files of a matching size, and a failed placement frees its content."""
+    library_dir = os.path.join(work_dir, "import_check")
+    os.makedirs(library_dir)
+    sources = midi_corpus.write_corpus(os.path.join(work_dir, "import_sources"),
+                                       ["format0_small", "format1_many_tracks", "format1_tempo_heavy"])
+    # An unindexed copy of format0_small, plus files no import should ever need to hash.
+    with open(sources["format0_small"], "rb") as f:
+        data = f.read()
+    with open(os.path.join(library_dir, "existing.mid"), "wb") as f:
+        f.write(data)
+    for i in range(20):
+        with open(os.path.join(library_dir, f"filler {i}.mid"), "wb") as f:
+            f.write(b"MThd" + bytes(i))
+    library = pianoblox.MidiLibrary(library_dir)
+    library.scan()
+    index = pianoblox.MidiSearchIndex(os.path.join(library_dir, "index.json"))
+
+    job = pianoblox.MidiImportJob([sources["format0_small"], sources["format1_many_tracks"]], library, index, workers=1)
+    job.run()
+    if job.imported != 1 or job.duplicates != 1:
+        raise AssertionError(f"import_dedup: {job.summary()} {job.errors}")
+    if any(name.startswith("filler") for name in index.docs):
+        raise AssertionError("import_dedup: library files of other sizes were hashed")
+
+    with open(sources["format1_tempo_heavy"], "rb") as f:
+        data = f.read()
+    job = pianoblox.MidiImportJob([], library, index, workers=1)
+
+    def fail(dest):
+        raise OSError("no space left on device")
+    job._import("first copy", "tempo.mid", lambda: data, fail)
+    job._import("second copy", "tempo.mid", lambda: data,
+                lambda dest: pianoblox.link_or_copy(sources["format1_tempo_heavy"], dest))
+    if (job.failed, job.imported, job.duplicates) != (1, 1, 0):
+        raise AssertionError(f"import_dedup: after a failed placement {job.summary()}")
+
+def check_control_commands(work_dir):
+    """Every control command works over the socket, and malformed requests get a clear error."""
+    source = midi_corpus.write_corpus(pianoblox.get_midi_directory(), ["format0_small"])["format0_small"]
+    pianoblox.kb_controller = FakeKeyController()
+    with quiet():
+        server = pianoblox.ControlServer(os.path.join(work_dir, "check.sock")).start()
+    try:
+        def send(cmd, **args):
+            with quiet():
+                reply = pianoblox.send_control_command(server.path, cmd, **args)
+            if not reply["ok"]:
+                raise AssertionError(f"control_commands: {cmd} {args} failed: {reply['error']}")
+            return reply["status"]
+
+        if send("load", file=os.path.basename(source))["song"] != os.path.basename(source):
+            raise AssertionError("control_commands: load did not load the song")
+        if not send("play")["playing"] or send("pause")["playing"]:
+            raise AssertionError("control_commands: play/pause did not toggle playback")
+        if send("seek", index=40)["index"] != 40 or send("seek", seconds=0)["index"] != 0:
+            raise AssertionError("control_commands: seek did not move to the requested position")
+        if send("speed", value=1.5)["speed"] != 1.5 or send("speed", value=1)["speed"] != 1.0:
+            raise AssertionError("control_commands: speed was not applied")
+
+        bad_requests = {
+            b"[1, 2]\n": "must be a JSON object",
+            b"{not json\n": "not valid JSON",
+            b'{"cmd": "dance"}\n': "unknown command",
+            b'{"cmd": "status", "extra": 1}\n': "status does not take 'extra'",
+            b'{"cmd": "seek", "index": "ten"}\n': "index must be an integer",
+            b'{"cmd": "seek", "index": true}\n': "index must be an integer",
+            b'{"cmd": "speed", "value": NaN}\n': "NaN is not allowed",
+            b'{"cmd": "speed", "value": -1}\n': "speed needs a positive value",
+            b'{"cmd": "load", "file": "missing.mid"}\n': "no such file",
+        }
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(server.path)
+            with sock.makefile("rb") as stream:
+                for line, expected in bad_requests.items():
+                    sock.sendall(line)
+                    reply = json.loads(stream.readline())
+                    if reply["ok"] or expected not in reply["error"]:
+                        raise AssertionError(f"control_commands: {line!r} replied {reply}, expected {expected!r}")
+    finally:
+        server.stop()
+        pianoblox.player.stop()
+
+def check_directory_watcher(work_dir):
+    """The watcher reports hardlinked, copied and created-in-place files exactly once each."""
+    directory = os.path.join(work_dir, "watched")
+    os.makedirs(directory)
+    source = midi_corpus.write_corpus(os.path.join(work_dir, "watch_sources"), ["format0_small"])["format0_small"]
+    events = []
+    watcher = pianoblox.MidiDirectoryWatcher(directory, lambda event, name: events.append((event, name)))
+    with quiet():
+        watcher.start()
+    try:
+        os.link(source, os.path.join(directory, "linked.mid"))
+        shutil.copy(source, os.path.join(directory, "copied.mid"))
+        os.close(os.open(os.path.join(directory, "touched.mid"), os.O_CREAT | os.O_RDONLY))
+        deadline = time.perf_counter() + watcher.CREATE_SETTLE + watcher.poll_interval + 2
+        while len(events) < 3 and time.perf_counter() < deadline:
+            time.sleep(0.05)
+        # Leave time for a second report of the same file to show up.
+        time.sleep(1.0)
+    finally:
+        watcher.stop()
+    expected = [("added", "copied.mid"), ("added", "linked.mid"), ("added", "touched.mid")]
+    if sorted(events) != expected:
+        raise AssertionError(f"directory_watcher ({watcher.mode}): got {sorted(events)}")
+
+def check_load_session_files(work_dir):
+    """A load job has written its session files by the time waiters see it finish."""
+    source = midi_corpus.write_corpus(pianoblox.get_midi_directory(), ["format1_tempo_heavy"])["format1_tempo_heavy"]
+    song_file = os.path.join(pianoblox.get_session_directory(), "song.json")
+    if os.path.exists(song_file):
+        os.remove(song_file)
+    pianoblox.get_song_store().clear()
+    with quiet():
+        job = pianoblox.MidiLoadJob(source).start()
+        job.wait()
+    if not job.finished or not os.path.exists(song_file):
+        raise AssertionError("load_session_files: the job finished before song.json was written")
+    with open(song_file, "r", encoding="utf-8") as f:
+        if len(json.load(f)["notes"]) != len(job.song["notes"]):
+            raise AssertionError("load_session_files: song.json does not hold the loaded song")
+
+CHECKS = {
+    "tempo_map": check_tempo_map,
+    "compressed_streams": check_compressed_streams,
+    "keystroke_limit": check_keystroke_limit,
+    "search_index_files": check_search_index_files,
+    "import_dedup": check_import_dedup,
+    "control_commands": check_control_commands,
+    "directory_watcher": check_directory_watcher,
+    "load_session_files": check_load_session_files,
+}
+
+def run_checks(work_dir, only=""):
+    """Run the correctness checks whose name contains only; each raises AssertionError on failure."""
+    for name, check in CHECKS.items():
+        case = f"check/{name}"
+        if only in case:
+            check(work_dir)
+            print(f"{case}: ok")
+
+# --- Baselines ---
+def summarize(results):
+    return {name: {"median": statistics.median(d), "min": min(d)} for name, d in sorted(results.items())}
+
+def compare(summary, baseline, tolerance):
+    """Print a comparison table and return the names of regressed cases."""
+    regressions = []
+    print(f"{'case':48} {'median':>12} {'baseline':>12} {'ratio':>8}")
+    for name, stats in summary.items():
+        base = baseline.get(name)
+        if base and base["median"] > 0:
+            ratio = stats["median"] / base["median"]
+            flag = ""
+            if ratio > 1 + tolerance:
+                flag = "  REGRESSION"
+                regressions.append(name)
+            elif ratio < 1 - tolerance:
+                flag = "  improved"
+            print(f"{name:48} {stats['median']:12.6f} {base['median']:12.6f} {ratio:8.2f}{flag}")
+        else:
+            print(f"{name:48} {stats['median']:12.6f} {'-':>12} {'-':>8}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Pianoblox benchmark suite.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case")
+    parser.add_argument("--only", default="", help="Only run cases whose name contains this text")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Store results in {BASELINE_FILE}")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before flagging (0.25 = 25%%)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on regressions")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Keep the benchmark's temp files out of the user's real library.
+        pianoblox.get_app_data_dir = lambda: work_dir
+        paths = midi_corpus.write_corpus(os.path.join(work_dir, "corpus"))
+        run_checks(work_dir, args.only)
+
+        results = bench_parsing(paths, work_dir, args.repeat, args.only)
+        results.update(bench_search_index(args.repeat, args.only))
+        results.update(bench_archive_import(paths, work_dir, args.repeat, args.only))
+        results.update(bench_parallel_parse(paths, args.repeat, args.only))
+        results.update(bench_control_server(work_dir, args.repeat, args.only))
+        if any(args.only in case for case in JITTER_CASES):
+            results.update(bench_scheduler_jitter(work_dir))
+        if any(args.only in case for case in GC_LOAD_CASES):
+            results.update(bench_scheduler_jitter(work_dir, cases=GC_LOAD_CASES, gc_load=True))
+        if any(args.only in case for case in LOW_JITTER_CASES):
+            results.update(bench_scheduler_jitter(work_dir, cases=LOW_JITTER_CASES, gc_load=True, low_jitter=True))
+        if any(args.only in case for case in HOTKEY_CASES):
+            results.update(bench_hotkey_latency())
+        if args.only in STRESS_CASE:
+            results.update(bench_player_stress())
+
+    summary = summarize(results)
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, "r") as f:
+            baseline = json.load(f).get("results", {})
+    regressions = compare(summary, baseline, args.tolerance)
+
+    if args.save_baseline:
+        baseline.update(summary)
+        with open(BASELINE_FILE, "w") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(), "results": baseline}, f, indent=2)
+        print(f"Baselines saved to {BASELINE_FILE}")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
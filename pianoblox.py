@@ -1,5 +1,6 @@
 import tkinter as tk
 from tkinter import scrolledtext, messagebox, filedialog, ttk
+import tkinter.font as tkfont
 import re
 import time
 import threading
@@ -8,12 +9,44 @@ import sys
 import codecs
 import random
 import shutil
+import signal
+import socket
+import stat
+import tarfile
+import tempfile
+import zipfile
+import heapq
+import hashlib
+import gc
+import io
+import json
+import itertools
+import mmap
+import multiprocessing
+import queue
+import contextlib
+import cProfile
+import pstats
+import tracemalloc
+from collections import OrderedDict, deque
+
+# Parse pool workers import this module only to decode tracks, so they skip the keyboard setup.
+# Spawn names the child process before it imports anything.
+PARSE_WORKER = multiprocessing.current_process().name != "MainProcess"
+
+if PARSE_WORKER:
+    keyboard = None
+else:
+    try:
+        from pynput import keyboard
+    except ImportError:
+        print("The 'pynput' library is required. Please install it via: pip install pynput")
+        exit()
 
 try:
-    from pynput import keyboard
+    import numpy as np
 except ImportError:
-    print("The 'pynput' library is required. Please install it via: pip install pynput")
-    exit()
+    np = None
 
 try:
     import appdirs
@@ -29,6 +62,7 @@ piano_music_cleaned_cache = ""
 
 KEY_DELAY = 0.1
 HOTKEY_CHARS = {'-', '=', '[', ']'} 
+HOTKEY_LATENCY_SAMPLES = 256
 
 # --- Number to QWERTY letter mapping ---
 NUM_TO_LETTER_MAP = {
@@ -37,28 +71,116 @@ NUM_TO_LETTER_MAP = {
 }
 
 # --- MIDI Playback Variables ---
-isPlaying = False
-storedIndex = 0
-elapsedTime = 0
 playback_speed = 1.0
 origionalPlaybackSpeed = 1.0
 speedMultiplier = 1.25
-infoTuple = None
-heldNotes = {}
 legitModeActive = False
 
+TEXT_EVENT_TYPES = range(0x01, 0x0D)
+
+# Virtual piano keys from the lowest to the highest note, one semitone apart.
+VIRTUAL_PIANO_SCALE = "1!2@34$5%6^78*9(0qQwWeErtTyYuiIoOpPasSdDfgGhHjJklLzZxcCvVbBnm"
+KEY_PITCH = {key: pitch for pitch, key in enumerate(VIRTUAL_PIANO_SCALE)}
+LOWEST_PIANO_KEY = 36  # MIDI key of VIRTUAL_PIANO_SCALE[0]
+
+# --- Track Filter Settings ---
+# MIDI channels (0-based) dropped unless a song asks for them; channel 10 is General MIDI percussion.
+DEFAULT_EXCLUDED_CHANNELS = frozenset({9})
+
+# --- Transposition Settings ---
+# Try shifting songs by up to TRANSPOSE_RANGE semitones to fit the virtual piano.
+AUTO_TRANSPOSE = True
+TRANSPOSE_RANGE = 12
+FOLDED_KEY_COST = 4
+
+# --- Keystroke Rate Limit Settings ---
+# Maximum keys sent per KEYSTROKE_WINDOW seconds of playback; None disables thinning.
+MAX_KEYSTROKES_PER_SECOND = 40
+# Songs are only thinned above this playback speed; at normal speed every key is played.
+KEYSTROKE_LIMIT_MIN_SPEED = 2.0
+KEYSTROKE_WINDOW = 0.5
+KEYSTROKE_REPORT_SECTION = 10.0
+
 conversionCases = {'!': '1', '@': '2', '£': '3', '$': '4', '%': '5', '^': '6', '&': '7', '*': '8', '(': '9', ')': '0'}
 
-kb_controller = keyboard.Controller()
+kb_controller = keyboard.Controller() if keyboard else None
+
+MAX_SCHEDULE_LAG = 0.05
 
 root = None
 piano_music_input_widget = None
 next_notes_display_widget = None
 keyboard_listener_object = None
+hotkey_queue = queue.SimpleQueue()
+manual_note_presses = queue.SimpleQueue()
+hotkey_latencies = deque(maxlen=HOTKEY_LATENCY_SAMPLES)
+control_thread = None
 midi_listbox = None
 speed_label = None
 autoplay_button = None
 status_label = None
+midi_library = None
+search_index = None
+midi_watcher = None
+import_job = None
+load_job = None
+load_midi_button = None
+sheet_insert_generation = 0
+browse_midi_button = None
+search_after_id = None
+displayed_library_version = None
+track_filters = {}
+
+SEARCH_DEBOUNCE_MS = 150
+LIBRARY_POLL_MS = 500
+IMPORT_POLL_MS = 100
+MIDI_ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+MAX_ARCHIVE_MEMBER_BYTES = 16 * 1024 * 1024
+LOAD_POLL_MS = 50
+SHEET_CHUNK_CHARS = 16384
+UI_REFRESH_MS = 33
+
+# --- Song Store Settings ---
+SONG_STORE_BYTES = 64 * 1024 * 1024
+SESSION_MAX_AGE = 7 * 24 * 3600
+song_store = None
+
+# --- Profiling Settings ---
+PROFILE_HOTKEY = keyboard.Key.f9 if keyboard else None
+PROFILE_TRACE_FRAMES = 10
+PROFILE_TOP_FUNCTIONS = 40
+PROFILE_TOP_ALLOCATIONS = 20
+profile_session = None
+
+# --- Parallel Parse Settings ---
+# Format 1 files with at least this many tracks and bytes decode their tracks in worker processes.
+# The parent spends about half the decode time unpickling what the workers send back, so it only
+# pays off with several CPUs and files big enough to hide the pool's fixed cost.
+PARALLEL_PARSE_MIN_TRACKS = 8
+PARALLEL_PARSE_MIN_BYTES = 512 * 1024
+PARALLEL_PARSE_MIN_CPUS = 4
+PARALLEL_PARSE_WORKERS = None  # None uses one worker per available CPU
+parse_pool = None
+parse_pool_lock = threading.Lock()
+
+# --- Low-Jitter Playback Settings ---
+# Freeze the GC and pin and prioritize the playback thread while a song plays (--low-jitter).
+LOW_JITTER_MODE = False
+LOW_JITTER_RT_PRIORITY = 10
+LOW_JITTER_NICE = -10
+low_jitter_lock = threading.Lock()
+low_jitter_users = 0
+low_jitter_gc_enabled = True
+
+ANALYTICS_CACHE_ENTRIES = 256
+analytics_cache = OrderedDict()
+analytics_lock = threading.Lock()
+midi_info_job = None
+control_server = None
+CONTROL_COMMAND_TIMEOUT = 30.0
+playlist = []
+playlist_lock = threading.Lock()
+prefetch_job = None
 
 # --- App Data Directory Functions ---
 def get_app_data_dir():
@@ -82,6 +204,235 @@ def get_temp_directory():
         os.makedirs(temp_dir, exist_ok=True)
     return temp_dir
 
+def get_session_directory():
+    """Get this instance's private directory for song.json and the other conversion files."""
+    session_dir = os.path.join(get_temp_directory(), f"session-{os.getpid()}")
+    if not os.path.exists(session_dir):
+        os.makedirs(session_dir, exist_ok=True)
+    return session_dir
+
+def find_last_session_song():
+    """Return the newest session directory holding a converted song, or None."""
+    temp_dir = get_temp_directory()
+    candidates = [temp_dir]
+    with os.scandir(temp_dir) as entries:
+        candidates += [entry.path for entry in entries if entry.name.startswith("session-") and entry.is_dir()]
+    newest, newest_mtime = None, None
+    for directory in candidates:
+        song_file = os.path.join(directory, "song.json")
+        if os.path.exists(song_file) and os.path.exists(os.path.join(directory, "sheetConversion.json")):
+            mtime = os.path.getmtime(song_file)
+            if newest_mtime is None or mtime > newest_mtime:
+                newest, newest_mtime = directory, mtime
+    return newest
+
+def prune_session_directories(keep=None):
+    """Remove session directories of other instances that have not been touched for SESSION_MAX_AGE."""
+    cutoff = time.time() - SESSION_MAX_AGE
+    own = os.path.basename(get_session_directory())
+    with os.scandir(get_temp_directory()) as entries:
+        for entry in entries:
+            if not entry.name.startswith("session-") or entry.name == own or entry.path == keep:
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry.path)
+                    print(f"[Debug] Removed stale session directory {entry.name}")
+            except OSError as e:
+                print(f"[Debug] Could not remove {entry.name}: {e}")
+
+# --- Profiling ---
+class ProfileSession:
+    """Collects cProfile statistics, stage timings and tracemalloc snapshots until the report is written.
+
+    Each stage gets its own cProfile.Profile on the thread it runs on; a stage
+    nested inside another on the same thread is only timed.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.timings = {}
+        self.memory = {}
+        self.profiles = []
+        self.local = threading.local()
+        tracemalloc.start(PROFILE_TRACE_FRAMES)
+        self.start_snapshot = tracemalloc.take_snapshot()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        profile = None
+        if not getattr(self.local, "active", False):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+                self.local.active = True
+            except ValueError:
+                # Another profiler is already running on this interpreter (Python 3.12+).
+                profile = None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if profile is not None:
+                profile.disable()
+                self.local.active = False
+            current, _ = tracemalloc.get_traced_memory()
+            with self.lock:
+                self.timings.setdefault(name, []).append(elapsed)
+                self.memory[name] = max(self.memory.get(name, 0), current)
+                if profile is not None:
+                    self.profiles.append(profile)
+
+    def write_report(self, directory):
+        """Stop tracing and write the text report and a .prof file; returns the report path."""
+        end_snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, "profile-" + time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started)))
+
+        out = io.StringIO()
+        out.write(f"Pianoblox profile, {time.time() - self.started:.1f}s recorded, peak traced memory {peak / 1048576:.1f} MiB\n\n")
+        out.write(f"{'stage':24} {'count':>7} {'total s':>10} {'mean ms':>10} {'max ms':>10} {'mem MiB':>9}\n")
+        with self.lock:
+            timings = {name: list(values) for name, values in self.timings.items()}
+            memory = dict(self.memory)
+            profiles = list(self.profiles)
+        for name, values in sorted(timings.items()):
+            out.write(f"{name:24} {len(values):7d} {sum(values):10.3f} {1000 * sum(values) / len(values):10.3f} "
+                      f"{1000 * max(values):10.3f} {memory[name] / 1048576:9.1f}\n")
+
+        out.write("\nTop allocations since profiling started:\n")
+        for allocation in end_snapshot.compare_to(self.start_snapshot, "lineno")[:PROFILE_TOP_ALLOCATIONS]:
+            out.write(f"  {allocation}\n")
+
+        if profiles:
+            out.write("\nCall statistics (cumulative):\n")
+            stats = pstats.Stats(*profiles, stream=out)
+            stats.sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+            stats.dump_stats(base + ".prof")
+
+        with codecs.open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(out.getvalue())
+        return base + ".txt"
+
+def profile_stage(name):
+    """Time and profile a block as the named stage while profiling is on; a no-op otherwise."""
+    session = profile_session
+    if session is None:
+        return contextlib.nullcontext()
+    return session.stage(name)
+
+def start_profiling():
+    """Start collecting profiling data for parse, load and playback."""
+    global profile_session
+    if profile_session is None:
+        profile_session = ProfileSession()
+        print("[Debug] Profiling started")
+
+def stop_profiling():
+    """Stop profiling and write the report under the app data directory; returns its path."""
+    global profile_session
+    session, profile_session = profile_session, None
+    if session is None:
+        return None
+    path = session.write_report(os.path.join(get_app_data_dir(), "profiles"))
+    print(f"[Debug] Profiling report saved to {path}")
+    return path
+
+def toggle_profiling():
+    """Switch profiling on or off, writing the report when it is switched off."""
+    if profile_session is None:
+        start_profiling()
+        post_ui("status", text="Profiling on - press F9 again to save the report")
+    else:
+        path = stop_profiling()
+        post_ui("status", text=f"Profiling report saved to {path}")
+
+# --- Low-Jitter Playback ---
+def tune_playback_thread():
+    """Pin the calling thread to one CPU and raise its scheduling priority where the OS allows it.
+
+    Tries SCHED_RR first, then a lower nice value, and keeps the normal
+    priority if neither is permitted. Returns (applied, undo), where applied
+    lists what was changed and undo() restores it.
+    """
+    applied, undo = [], []
+    if hasattr(os, "sched_setaffinity"):
+        try:
+            cpus = os.sched_getaffinity(0)
+            if len(cpus) > 1:
+                # On Linux pid 0 means the calling thread, not the whole process.
+                os.sched_setaffinity(0, {max(cpus)})
+                undo.append(lambda: os.sched_setaffinity(0, cpus))
+                applied.append(f"pinned to CPU {max(cpus)}")
+        except OSError as e:
+            print(f"[Debug] Could not pin playback thread: {e}")
+
+    if hasattr(os, "sched_setscheduler"):
+        try:
+            policy, param = os.sched_getscheduler(0), os.sched_getparam(0)
+            os.sched_setscheduler(0, os.SCHED_RR, os.sched_param(LOW_JITTER_RT_PRIORITY))
+            undo.append(lambda: os.sched_setscheduler(0, policy, param))
+            applied.append(f"SCHED_RR priority {LOW_JITTER_RT_PRIORITY}")
+        except OSError:
+            pass
+    if not any(a.startswith("SCHED_RR") for a in applied) and hasattr(threading, "get_native_id"):
+        try:
+            thread_id = threading.get_native_id()
+            nice = os.getpriority(os.PRIO_PROCESS, thread_id)
+            if nice > LOW_JITTER_NICE:
+                os.setpriority(os.PRIO_PROCESS, thread_id, LOW_JITTER_NICE)
+                undo.append(lambda: os.setpriority(os.PRIO_PROCESS, thread_id, nice))
+                applied.append(f"nice {LOW_JITTER_NICE}")
+        except (OSError, AttributeError):
+            pass
+
+    def restore():
+        for step in reversed(undo):
+            try:
+                step()
+            except OSError:
+                pass
+    return applied, restore
+
+@contextlib.contextmanager
+def low_jitter_playback():
+    """Run a playback thread in low-jitter mode while LOW_JITTER_MODE is on; a no-op otherwise.
+
+    The GC is collected once, frozen and disabled for as long as any playback
+    thread is inside the block, so no collection pause can land in a dense
+    passage; cyclic garbage made meanwhile is only reclaimed afterwards.
+    """
+    global low_jitter_users, low_jitter_gc_enabled
+    if not LOW_JITTER_MODE:
+        yield
+        return
+
+    with low_jitter_lock:
+        if low_jitter_users == 0:
+            low_jitter_gc_enabled = gc.isenabled()
+            gc.collect()
+            if hasattr(gc, "freeze"):
+                gc.freeze()
+            gc.disable()
+        low_jitter_users += 1
+    applied, restore = tune_playback_thread()
+    print(f"[Debug] Low-jitter playback: GC disabled{''.join(', ' + a for a in applied)}")
+    try:
+        yield
+    finally:
+        restore()
+        with low_jitter_lock:
+            low_jitter_users -= 1
+            if low_jitter_users == 0:
+                if hasattr(gc, "unfreeze"):
+                    gc.unfreeze()
+                if low_jitter_gc_enabled:
+                    gc.enable()
+
 # --- Core Logic Functions ---
 def update_music_caches():
     """Reads music from input, updates raw and cleaned caches. Returns True if changed."""
@@ -112,14 +463,13 @@ def reset_progress_state():
 
 def handle_reset_button():
     """Action for the Reload Music / Start Over button."""
-    global isPlaying, storedIndex, elapsedTime, status_label
+    global status_label
     
     update_music_caches() 
     reset_progress_state()
     
-    isPlaying = False
-    storedIndex = 0
-    elapsedTime = 0
+    player.stop()
+    seek_to_index(0)
     if autoplay_button:
         autoplay_button.config(text="Start Autoplay")
     
@@ -211,34 +561,363 @@ def play_next_note_action():
         
         time.sleep(KEY_DELAY)
 
+# --- UI Update Bus ---
+class UiUpdateBus:
+    """Latest-value store for widget updates posted from any thread.
+
+    post() and post_call() only record the newest state per name. The Tk
+    thread applies whatever changed every UI_REFRESH_MS, so a burst of
+    updates between two refreshes costs a single widget call.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.configs = {}
+        self.calls = {}
+
+    def post(self, name, **options):
+        with self.lock:
+            self.configs.setdefault(name, {}).update(options)
+
+    def post_call(self, name, func, *args):
+        with self.lock:
+            self.calls[name] = (func, args)
+
+    def take(self):
+        with self.lock:
+            configs, self.configs = self.configs, {}
+            calls, self.calls = self.calls, {}
+        return configs, calls
+
+UI_WIDGETS = {
+    "status": lambda: status_label,
+    "speed": lambda: speed_label,
+    "autoplay": lambda: autoplay_button,
+    "load_button": lambda: load_midi_button,
+}
+
+ui_bus = UiUpdateBus()
+
+def post_ui(name, **options):
+    """Queue a config() of a UI_WIDGETS widget; only the latest options reach the widget."""
+    ui_bus.post(name, **options)
+
+def post_ui_call(name, func, *args):
+    """Queue func(*args) to run on the Tk thread; a later call with the same name replaces it."""
+    ui_bus.post_call(name, func, *args)
+
+def apply_ui_updates():
+    """Apply the latest posted UI state, then schedule the next refresh. Runs on the Tk thread."""
+    configs, calls = ui_bus.take()
+    for name, options in configs.items():
+        widget = UI_WIDGETS[name]()
+        if widget:
+            widget.config(**options)
+    for name, (func, args) in calls.items():
+        try:
+            func(*args)
+        except Exception as e:
+            print(f"[Debug] UI update {name} failed: {e}")
+    if root:
+        root.after(UI_REFRESH_MS, apply_ui_updates)
+
 # --- Hotkey Listener ---
+MIDI_HOTKEYS = (keyboard.Key.delete, keyboard.Key.home, keyboard.Key.end,
+                keyboard.Key.page_up, keyboard.Key.page_down, PROFILE_HOTKEY) if keyboard else ()
+
 def key_handler(key, is_press):
-    """Handle keyboard events for both normal and MIDI playback."""
-    global isPlaying
-    
-    if is_press and key in [keyboard.Key.delete, keyboard.Key.home, keyboard.Key.end, 
-                      keyboard.Key.page_up, keyboard.Key.page_down]:
-        handle_midi_keypress(key)
+    """Queue hotkey presses for the control loop; runs on the listener thread and never blocks."""
+    if not is_press:
         return True
-        
-    if is_press:
-        try:
-            pressed_char = key.char
-            if pressed_char and pressed_char in HOTKEY_CHARS:
-                if root:
-                    root.after_idle(play_next_note_action)
-        except AttributeError:
-            pass
-            
+    if key in MIDI_HOTKEYS or getattr(key, "char", None) in HOTKEY_CHARS:
+        hotkey_queue.put((key, time.perf_counter()))
     return True
 
 def on_key_press(key):
     """Callback for pynput keyboard listener for keypresses."""
     return key_handler(key, True)
 
+def dispatch_hotkey(key):
+    """Run the action bound to a queued hotkey, or a queued control command."""
+    if callable(key):
+        key()
+    elif key in MIDI_HOTKEYS:
+        handle_midi_keypress(key)
+    elif root:
+        # post_ui_call keeps only the latest call, so count presses separately to play each one.
+        manual_note_presses.put(key)
+        post_ui_call("manual_notes", play_queued_notes)
+
+def play_queued_notes():
+    """Play one manual-mode note for each hotkey press queued since the last UI refresh. Runs on the Tk thread."""
+    while True:
+        try:
+            manual_note_presses.get_nowait()
+        except queue.Empty:
+            return
+        play_next_note_action()
+
+def control_loop():
+    """Consume queued hotkeys in order and record how long each waited in the queue."""
+    while True:
+        key, posted = hotkey_queue.get()
+        if key is None:
+            return
+        hotkey_latencies.append(time.perf_counter() - posted)
+        try:
+            dispatch_hotkey(key)
+        except Exception as e:
+            print(f"[Debug] Error handling hotkey {key}: {e}")
+
+def start_control_loop():
+    """Start the hotkey control thread if it is not already running."""
+    global control_thread
+    if control_thread and control_thread.is_alive():
+        return
+    control_thread = threading.Thread(target=control_loop, daemon=True)
+    control_thread.start()
+
+def hotkey_latency_stats():
+    """Return count, mean, p95 and max of recent hotkey-to-action delays in seconds."""
+    samples = sorted(hotkey_latencies)
+    if not samples:
+        return {"count": 0, "mean": 0.0, "p95": 0.0, "max": 0.0}
+    return {
+        "count": len(samples),
+        "mean": sum(samples) / len(samples),
+        "p95": samples[int(0.95 * (len(samples) - 1))],
+        "max": samples[-1],
+    }
+
+# --- Control Server ---
+def run_on_control_loop(func, *args):
+    """Run func on the control thread, in order with hotkeys, and return its result."""
+    from concurrent.futures import Future
+    future = Future()
+
+    def call():
+        try:
+            future.set_result(func(*args))
+        except Exception as e:
+            future.set_exception(e)
+
+    start_control_loop()
+    hotkey_queue.put((call, time.perf_counter()))
+    return future.result(CONTROL_COMMAND_TIMEOUT)
+
+def playback_status():
+    """Return a JSON-serializable snapshot of the playback state."""
+    with player.lock:
+        path, playing, index = player.path, player.playing, player.index
+        events = len(player.info[2]) if player.info else 0
+    with playlist_lock:
+        queued = len(playlist)
+    return {
+        "song": os.path.basename(path) if path else None,
+        "playing": playing,
+        "index": index,
+        "events": events,
+        "position": player.clock.media_now(),
+        "speed": playback_speed,
+        "playlist": queued,
+        "loading": bool(load_job and not load_job.finished),
+        "hotkey_latency": hotkey_latency_stats(),
+    }
+
+def control_load(file=None):
+    """Control command: load a library file name or a path."""
+    if not file:
+        raise ValueError("load needs a file")
+    path = file if os.path.isabs(file) else os.path.join(get_midi_directory(), file)
+    if not os.path.exists(path):
+        raise ValueError(f"no such file: {file}")
+    load_midi_file(path)
+
+def control_play():
+    """Control command: start playback of the loaded song."""
+    if not player.info:
+        raise ValueError("no song loaded")
+    if not player.playing:
+        toggle_autoplay()
+
+def control_pause():
+    """Control command: pause playback at the current position."""
+    if player.playing:
+        toggle_autoplay()
+
+def control_seek(index=None, seconds=None):
+    """Control command: move to an event index or a position in seconds at 1x speed."""
+    if not player.info:
+        raise ValueError("no song loaded")
+    notes = player.info[2]
+    if seconds is not None:
+        elapsed, index = 0.0, 0
+        while index < len(notes) and elapsed + floor_to_zero(notes[index][0]) <= float(seconds):
+            elapsed += floor_to_zero(notes[index][0])
+            index += 1
+    if index is None:
+        raise ValueError("seek needs index or seconds")
+    seek_to_index(max(0, min(int(index), len(notes))))
+
+def control_speed(value=None):
+    """Control command: set the playback speed multiplier."""
+    if value is None or float(value) <= 0:
+        raise ValueError("speed needs a positive value")
+    set_playback_speed(float(value))
+    apply_keystroke_limit()
+
+# name: (handler, {argument: accepted JSON types})
+CONTROL_COMMANDS = {
+    "load": (control_load, {"file": (str,)}),
+    "play": (control_play, {}),
+    "pause": (control_pause, {}),
+    "seek": (control_seek, {"index": (int,), "seconds": (int, float)}),
+    "speed": (control_speed, {"value": (int, float)}),
+    "status": (lambda: None, {}),
+}
+JSON_TYPE_NAMES = {str: "a string", int: "an integer", float: "a number"}
+
+def parse_control_request(line):
+    """Decode one request line into (handler, arguments); ValueError explains what is wrong with it."""
+    def reject_constant(name):
+        raise ValueError(f"{name} is not allowed")
+    try:
+        request = json.loads(line, parse_constant=reject_constant)
+    except ValueError as e:
+        raise ValueError(f"request is not valid JSON: {e}")
+    if not isinstance(request, dict):
+        raise ValueError('request must be a JSON object such as {"cmd": "status"}')
+    name = request.pop("cmd", None)
+    if not isinstance(name, str) or name not in CONTROL_COMMANDS:
+        raise ValueError(f"unknown command {name!r}, expected one of {', '.join(CONTROL_COMMANDS)}")
+    handler, params = CONTROL_COMMANDS[name]
+    for arg, value in request.items():
+        if arg not in params:
+            expected = ", ".join(params) if params else "no arguments"
+            raise ValueError(f"{name} does not take {arg!r}; it takes {expected}")
+        # bool is an int subclass, but true/false is never a valid count or position.
+        if isinstance(value, bool) or not isinstance(value, params[arg]):
+            raise ValueError(f"{name}: {arg} must be {JSON_TYPE_NAMES[params[arg][-1]]}")
+    return handler, request
+
+class ControlServer:
+    """Serves newline-delimited JSON control commands on a Unix-domain socket.
+
+    Each request is an object such as {"cmd": "seek", "index": 120}; each reply
+    is {"ok": true, "status": {...}} or {"ok": false, "error": "..."}. Requests
+    are checked against CONTROL_COMMANDS before they run. Commands run on the
+    control thread, so they are ordered with the global hotkeys.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.sock = None
+        self.running = False
+        self.inode = None
+
+    def start(self):
+        """Bind and start serving; raises OSError if the path is taken by a file or a live server."""
+        self.remove_stale_socket()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.bind(self.path)
+            self.inode = os.lstat(self.path).st_ino
+            sock.listen(8)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+        self.running = True
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        print(f"[Debug] Control server listening on {self.path}")
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.sock:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.sock.close()
+        # Only remove the socket we bound; another instance may own the path by now.
+        if self.inode is not None:
+            try:
+                if os.lstat(self.path).st_ino == self.inode:
+                    os.unlink(self.path)
+            except OSError:
+                pass
+            self.inode = None
+
+    def remove_stale_socket(self):
+        """Remove a socket left at path by a server that is gone; refuse anything else."""
+        try:
+            st = os.lstat(self.path)
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(st.st_mode):
+            raise FileExistsError(f"{self.path} exists and is not a socket")
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except OSError:
+            os.unlink(self.path)
+            return
+        finally:
+            probe.close()
+        raise FileExistsError(f"another control server is listening on {self.path}")
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        with conn, conn.makefile("rwb") as stream:
+            for line in stream:
+                if not line.strip():
+                    continue
+                reply = self.handle(line)
+                stream.write(json.dumps(reply).encode("utf-8") + b"\n")
+                stream.flush()
+
+    def handle(self, line):
+        """Run one request line and return the reply object."""
+        try:
+            handler, args = parse_control_request(line)
+            run_on_control_loop(lambda: handler(**args))
+            return {"ok": True, "status": playback_status()}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+def start_control_server(path=None):
+    """Start the control socket server, by default in this instance's session directory."""
+    global control_server
+    if not hasattr(socket, "AF_UNIX"):
+        print("[Debug] Control server needs Unix-domain sockets, which this platform lacks")
+        return None
+    if control_server is None:
+        try:
+            control_server = ControlServer(path or os.path.join(get_session_directory(), "control.sock")).start()
+        except OSError as e:
+            print(f"[Debug] Control server not started: {e}")
+    return control_server
+
+def send_control_command(path, cmd, **args):
+    """Send one command to a control server and return its decoded reply."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(json.dumps(dict(args, cmd=cmd)).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as stream:
+            return json.loads(stream.readline())
+
 def start_keyboard_listener():
     global keyboard_listener_object
     print("[Debug] Starting keyboard listener...")
+    start_control_loop()
     try:
         if keyboard_listener_object and keyboard_listener_object.is_alive():
             keyboard_listener_object.stop()
@@ -250,6 +929,58 @@ def start_keyboard_listener():
     except Exception as e:
         print(f"[Debug] Error starting keyboard listener: {e}")
 
+# --- Daemon Mode ---
+def resolve_midi_path(name):
+    """Return name as an absolute path if it exists, else the library file of that name, or None."""
+    if os.path.exists(name):
+        return os.path.abspath(name)
+    library_path = os.path.join(get_midi_directory(), name)
+    if os.path.exists(library_path):
+        return library_path
+    return None
+
+def run_daemon(files):
+    """Play without the Tk interface until interrupted; only the hotkey listener and key output run.
+
+    The first file is loaded and the rest are queued as a playlist. With no
+    files the song of the last session is used.
+    """
+    stop_event = threading.Event()
+    paths = []
+    for name in files:
+        path = resolve_midi_path(name)
+        if path:
+            paths.append(path)
+        else:
+            print(f"[Debug] Daemon: no such MIDI file: {name}")
+
+    if paths:
+        load_midi_file(paths[0])
+        with playlist_lock:
+            playlist.extend(paths[1:])
+        prefetch_next_song()
+    if not player.info:
+        print("[Debug] Daemon: no song loaded; load one over the control socket or pass a file")
+
+    start_keyboard_listener()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    print("Pianoblox daemon running: DELETE start/stop, HOME/END rewind/skip, "
+          "PAGE UP/DOWN speed, F9 profiling, Ctrl+C to quit")
+    try:
+        while not stop_event.wait(0.5):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("[Debug] Daemon: shutting down")
+        player.stop()
+        if keyboard_listener_object:
+            keyboard_listener_object.stop()
+        stop_profiling()
+        if control_server:
+            control_server.stop()
+        shutdown_parse_pool()
+
 # --- GUI Setup ---
 def setup_and_run_gui():
     global root, piano_music_input_widget, next_notes_display_widget, keyboard_listener_object
@@ -354,7 +1085,7 @@ def setup_and_run_gui():
     search_var = tk.StringVar()
     search_entry = ttk.Entry(search_sort_frame, textvariable=search_var, width=20)
     search_entry.pack(side=tk.LEFT, padx=(0, 10))
-    search_entry.bind("<KeyRelease>", search_midi_files)
+    search_entry.bind("<KeyRelease>", schedule_midi_search)
     
     ttk.Label(search_sort_frame, text="Sort by:", 
              background=section_bg).pack(side=tk.LEFT, padx=(0, 5))
@@ -375,8 +1106,11 @@ def setup_and_run_gui():
     midi_list_frame = ttk.Frame(midi_frame)
     midi_list_frame.pack(fill=tk.BOTH, expand=True)
     
-    midi_listbox = tk.Listbox(
-        midi_list_frame, height=6, 
+    scrollbar = tk.Scrollbar(midi_list_frame, orient="vertical")
+    scrollbar.pack(side=tk.RIGHT, fill="y")
+    
+    midi_listbox = VirtualListbox(
+        midi_list_frame, scrollbar, height=6, 
         font=("Consolas", 10),
         background="white", foreground="#2c3e50",
         borderwidth=1, relief="solid",
@@ -385,22 +1119,23 @@ def setup_and_run_gui():
     midi_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
     midi_listbox.bind("<<ListboxSelect>>", show_midi_info)
     
-    scrollbar = tk.Scrollbar(midi_list_frame, orient="vertical")
-    scrollbar.config(command=midi_listbox.yview)
-    scrollbar.pack(side=tk.RIGHT, fill="y")
-    midi_listbox.config(yscrollcommand=scrollbar.set)
-    
     refresh_midi_list()
+    start_search_index_sync()
+    start_midi_directory_watcher()
+    root.after(LIBRARY_POLL_MS, poll_library_changes)
+    root.after(UI_REFRESH_MS, apply_ui_updates)
     
     midi_button_frame = ttk.Frame(midi_frame, padding=(0, 10, 0, 0))
     midi_button_frame.pack(fill=tk.X)
     
+    global load_midi_button
     load_midi_button = ttk.Button(
         midi_button_frame, text="Load Selected", 
         command=load_selected_midi, style="TButton", width=12
     )
     load_midi_button.pack(side=tk.LEFT, padx=(0, 5))
     
+    global browse_midi_button
     browse_midi_button = ttk.Button(
         midi_button_frame, text="Import Files...", 
         command=browse_for_midi, style="TButton", width=12
@@ -411,7 +1146,28 @@ def setup_and_run_gui():
         midi_button_frame, text="Delete Selected", 
         command=delete_selected_midi, style="TButton", width=12
     )
-    delete_midi_button.pack(side=tk.LEFT)
+    delete_midi_button.pack(side=tk.LEFT, padx=(0, 5))
+    
+    tracks_midi_button = ttk.Button(
+        midi_button_frame, text="Tracks...", 
+        command=choose_midi_tracks, style="TButton", width=12
+    )
+    tracks_midi_button.pack(side=tk.LEFT)
+    
+    playlist_button_frame = ttk.Frame(midi_frame, padding=(0, 5, 0, 0))
+    playlist_button_frame.pack(fill=tk.X)
+    
+    queue_midi_button = ttk.Button(
+        playlist_button_frame, text="Queue Selected", 
+        command=queue_selected_midi, style="TButton", width=12
+    )
+    queue_midi_button.pack(side=tk.LEFT, padx=(0, 5))
+    
+    clear_playlist_button = ttk.Button(
+        playlist_button_frame, text="Clear Queue", 
+        command=clear_playlist, style="TButton", width=12
+    )
+    clear_playlist_button.pack(side=tk.LEFT)
     
     control_frame = ttk.Frame(main_container, style="Section.TFrame", padding=10)
     control_frame.pack(fill=tk.BOTH, padx=2, pady=5)
@@ -422,7 +1178,7 @@ def setup_and_run_gui():
     shortcuts_frame = ttk.Frame(control_frame)
     shortcuts_frame.pack(fill=tk.X, pady=5)
     
-    shortcut_text = "DELETE: Start/Stop   |   HOME: Rewind 10 notes   |   END: Skip 10 notes   |   PAGE UP/DOWN: Speed"
+    shortcut_text = "DELETE: Start/Stop   |   HOME: Rewind 10 notes   |   END: Skip 10 notes   |   PAGE UP/DOWN: Speed   |   F9: Profile"
     ttk.Label(shortcuts_frame, text=shortcut_text, 
              background=section_bg, font=("Arial", 9)).pack(anchor="w")
     
@@ -516,6 +1272,12 @@ def setup_and_run_gui():
         result = messagebox.askokcancel("Exit", "Are you sure you want to exit?", parent=root)
         root.wm_attributes("-topmost", 1)
         if result:
+            if midi_watcher:
+                midi_watcher.stop()
+            stop_profiling()
+            if control_server:
+                control_server.stop()
+            shutdown_parse_pool()
             root.destroy()
 
     root.protocol("WM_DELETE_WINDOW", on_closing)
@@ -529,6 +1291,105 @@ def setup_and_run_gui():
         
     root.mainloop()
 
+def open_midi_buffer(source):
+    """Return (memoryview, mmap or None) over the bytes of a path, bytes-like object or stream.
+
+    Paths and plain binary files are memory-mapped instead of read into
+    memory; other streams, including gzip, bz2 and lzma wrappers that also
+    have a fileno(), are read once. The caller releases the view and closes
+    the map.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return map_midi_file(f)
+    if hasattr(source, "read"):
+        raw = source.raw if isinstance(source, io.BufferedReader) else source
+        if isinstance(raw, io.FileIO) and source.seekable() and source.tell() == 0:
+            return map_midi_file(source)
+        return memoryview(source.read()), None
+    view = memoryview(source)
+    if view.ndim != 1 or view.format != "B":
+        view = view.cast("B")
+    return view, None
+
+def map_midi_file(f):
+    """Memory-map an open binary file, falling back to reading it for empty or unmappable files."""
+    try:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return memoryview(f.read()), None
+    return memoryview(mapped), mapped
+
+def available_cpus():
+    """Return the number of CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def get_parse_pool():
+    """Get the shared process pool for parallel track decoding, starting it on first use.
+
+    Workers are spawned rather than forked so they never inherit the Tk
+    and listener threads of the GUI process.
+    """
+    global parse_pool
+    from concurrent.futures import ProcessPoolExecutor
+    with parse_pool_lock:
+        if parse_pool is None:
+            parse_pool = ProcessPoolExecutor(max_workers=PARALLEL_PARSE_WORKERS or available_cpus(),
+                                             mp_context=multiprocessing.get_context("spawn"))
+        return parse_pool
+
+def shutdown_parse_pool():
+    """Stop the parse worker processes, if any were started."""
+    global parse_pool
+    with parse_pool_lock:
+        if parse_pool is not None:
+            parse_pool.shutdown(wait=False, cancel_futures=True)
+            parse_pool = None
+
+# --- Key Mapping ---
+def build_key_table(transpose=0):
+    """Map each of the 128 MIDI keys to a virtual piano key, folding out-of-range keys by octaves."""
+    table = []
+    for key in range(128):
+        index = key - LOWEST_PIANO_KEY + transpose
+        while index >= len(VIRTUAL_PIANO_SCALE):
+            index -= 12
+        while index < 0:
+            index += 12
+        table.append(VIRTUAL_PIANO_SCALE[index])
+    return tuple(table)
+
+KEY_TABLE = build_key_table()
+
+def transposition_cost(histogram, shift):
+    """Return (folded, shifted) key counts for a pitch histogram played at the given shift."""
+    folded = shifted = 0
+    for key, count in enumerate(histogram):
+        if not count:
+            continue
+        index = key - LOWEST_PIANO_KEY + shift
+        if index < 0 or index >= len(VIRTUAL_PIANO_SCALE):
+            folded += count
+        elif is_shifted(VIRTUAL_PIANO_SCALE[index]):
+            shifted += count
+    return folded, shifted
+
+def best_transposition(histogram, search_range=None):
+    """Return the shift that minimizes folded and shift-required keys, preferring smaller shifts."""
+    search_range = TRANSPOSE_RANGE if search_range is None else search_range
+    best_shift, best_cost = 0, None
+    for shift in sorted(range(-search_range, search_range + 1), key=lambda s: (abs(s), s)):
+        folded, shifted = transposition_cost(histogram, shift)
+        cost = folded * FOLDED_KEY_COST + shifted
+        if best_cost is None or cost < best_cost:
+            best_shift, best_cost = shift, cost
+    return best_shift
+
+class MidiLoadCancelled(Exception):
+    """Raised inside a MIDI load when it was cancelled or superseded."""
+
 class MidiFile:
     startSequence = [
         [0x4D, 0x54, 0x68, 0x64],
@@ -560,9 +1421,21 @@ class MidiFile:
         0x0C: "Other text format [0x0C]"
     }
 
-    def __init__(self, midi_file, verbose=False, debug=False):
+    def __init__(self, midi_file, verbose=False, debug=False, cancel_check=None, transpose=None,
+                 tracks=None, exclude_tracks=(), channels=None, exclude_channels=None, record_file=None,
+                 parallel=None):
+        """Parse a MIDI file given as a path, a bytes-like object or a readable binary stream.
+
+        Files on disk are memory-mapped. The processing log is only kept when
+        record_file is given or verbose/debug output is on. parallel=True
+        decodes the tracks of a format 1 file on disk in the parse pool, False
+        never does, and None does so for large format 1 files when at least
+        PARALLEL_PARSE_MIN_CPUS CPUs are available; the result is the same
+        either way.
+        """
         self.verbose = verbose
         self.debug = debug
+        self.cancel_check = cancel_check
 
         self.bytes = -1
         self.headerLength = -1
@@ -576,34 +1449,64 @@ class MidiFile:
         self.tempo = 0
 
         self.midiRecord_list = []
-        self.record_file = os.path.join(get_temp_directory(), "midiRecord.json")
-        self.midi_file = midi_file
+        if record_file is None and (verbose or debug):
+            record_file = os.path.join(get_session_directory(), "midiRecord.json")
+        self.record_file = record_file
+        self.midi_file = midi_file if isinstance(midi_file, (str, os.PathLike)) else getattr(midi_file, "name", "<memory>")
 
         self.deltaTimeStarted = False
         self.deltaTime = 0
 
         self.key_press_count = 0
 
-        self.virtualPianoScale = list("1!2@34$5%6^78*9(0qQwWeErtTyYuiIoOpPasSdDfgGhHjJklLzZxcCvVbBnm")
+        self.key_table = KEY_TABLE
+        self.transpose = transpose
+        self.transposition = 0
+        self.pitch_histogram = [0] * 128
+        self.pitched_notes = []
+
+        if exclude_channels is None:
+            exclude_channels = DEFAULT_EXCLUDED_CHANNELS
+        self.channel_enabled = [(channels is None or c in channels) and c not in exclude_channels for c in range(16)]
+        self.include_tracks = None if tracks is None else set(tracks)
+        self.exclude_tracks = set(exclude_tracks)
+        self.track_index = -1
+        self.track_enabled = True
+        self.filtered_count = 0
 
         self.startCounter = [0] * len(MidiFile.startSequence)
+        self.chunk_table = None
 
         self.runningStatusSet = False
 
         self.events = []
         self.notes = []
+        self.text_events = []
         self.success = False
 
-        print("Processing", midi_file)
+        self.log("Processing", self.midi_file)
+        mapped = None
         try:
-            with open(self.midi_file, "rb") as f:
-                self.bytes = bytearray(f.read())
-            self.readEvents()
-            print(self.key_press_count, "notes processed")
-            self.clean_notes()
+            with profile_stage("midi_parse"):
+                self.bytes, mapped = open_midi_buffer(midi_file)
+                if self.wants_parallel_decode(midi_file, parallel):
+                    self.readEventsParallel(midi_file, force=parallel)
+                else:
+                    self.readEvents()
+                self.log(self.key_press_count, "notes processed")
+                if self.filtered_count:
+                    self.log(self.filtered_count, "notes filtered out by track or channel")
+                self.apply_transposition()
+                self.clean_notes()
             self.success = True
         finally:
-            self.save_record(self.record_file)
+            if isinstance(self.bytes, memoryview):
+                self.bytes.release()
+            self.bytes = None
+            if mapped is not None:
+                mapped.close()
+            if self.record_file:
+                self.save_record(self.record_file)
 
     def checkStartSequence(self):
         for i in range(len(self.startSequence)):
@@ -627,8 +1530,15 @@ class MidiFile:
         return length
 
     def readMTrk(self):
+        self.track_index += 1
+        self.track_enabled = self.track_index not in self.exclude_tracks and (
+            self.include_tracks is None or self.track_index in self.include_tracks)
         length = self.getInt(4)
         self.log("MTrk len", length)
+        if self.chunk_table is not None:
+            self.chunk_table.append((self.track_index, self.track_enabled, self.itr, length))
+            self.itr += length
+            return
         self.readMidiTrackEvent(length)
 
     def readMThd(self):
@@ -664,8 +1574,10 @@ class MidiFile:
             self.log("END TRACK")
             self.itr += 2
             return False
-        elif type in [0x01, 0x02, 0x03, 0x04, 0x05, 0x06, 0x07, 0x08, 0x09, 0x0A, 0x0C]:
-            self.log("\t", self.readText(length))
+        elif type in TEXT_EVENT_TYPES:
+            text = self.readText(length)
+            self.text_events.append((type, text))
+            self.log("\t", text)
         elif type == 0x51:
             tempo = round(60000000 / self.getInt(3))
             self.tempo = tempo
@@ -681,7 +1593,11 @@ class MidiFile:
         self.deltaTime = 0
         start = self.itr
         continueFlag = True
+        eventCount = 0
         while length > self.itr - start and continueFlag:
+            eventCount += 1
+            if self.cancel_check and not eventCount & 0x3FF and self.cancel_check():
+                raise MidiLoadCancelled()
             deltaT = self.readLength()
             self.deltaTime += deltaT
 
@@ -716,19 +1632,21 @@ class MidiFile:
             velocity = self.bytes[self.itr]
             self.itr += 1
 
-            map = key - 23 - 12 - 1
-            while map >= len(self.virtualPianoScale):
-                map -= 12
-            while map < 0:
-                map += 12
+            if not (self.track_enabled and self.channel_enabled[channel]):
+                if velocity:
+                    self.filtered_count += 1
+                return
 
+            note = self.key_table[key]
             if velocity == 0:
-                self.log(self.deltaTime / self.division, "~" + self.virtualPianoScale[map])
-                self.notes.append([(self.deltaTime / self.division), "~" + self.virtualPianoScale[map]])
+                note = "~" + note
             else:
-                self.log(self.deltaTime / self.division, self.virtualPianoScale[map])
-                self.notes.append([(self.deltaTime / self.division), self.virtualPianoScale[map]])
+                self.pitch_histogram[key] += 1
                 self.key_press_count += 1
+            entry = [(self.deltaTime / self.division), note]
+            self.log(entry[0], note)
+            self.notes.append(entry)
+            self.pitched_notes.append((entry, key, velocity == 0))
 
         elif type >> 4 == 0x8:
             key = self.bytes[self.itr]
@@ -736,14 +1654,13 @@ class MidiFile:
             velocity = self.bytes[self.itr]
             self.itr += 1
 
-            map = key - 23 - 12 - 1
-            while map >= len(self.virtualPianoScale):
-                map -= 12
-            while map < 0:
-                map += 12
+            if not (self.track_enabled and self.channel_enabled[channel]):
+                return
 
-            self.log(self.deltaTime / self.division, "~" + self.virtualPianoScale[map])
-            self.notes.append([(self.deltaTime / self.division), "~" + self.virtualPianoScale[map]])
+            entry = [(self.deltaTime / self.division), "~" + self.key_table[key]]
+            self.log(entry[0], entry[1])
+            self.notes.append(entry)
+            self.pitched_notes.append((entry, key, True))
 
         elif not type >> 4 in [0x8, 0x9, 0xA, 0xB, 0xD, 0xE]:
             self.log("VoiceEvent", hex(type), hex(self.bytes[self.itr]), "DT", deltaT)
@@ -752,6 +1669,19 @@ class MidiFile:
             self.log("VoiceEvent", hex(type), hex(self.bytes[self.itr]), hex(self.bytes[self.itr + 1]), "DT", deltaT)
             self.itr += 2
 
+    def apply_transposition(self):
+        """Remap the parsed keys to the requested or best-fitting transposition."""
+        shift = self.transpose
+        if shift is None:
+            shift = best_transposition(self.pitch_histogram) if AUTO_TRANSPOSE else 0
+        if shift == self.transposition:
+            return
+        self.key_table = build_key_table(shift)
+        self.transposition = shift
+        for entry, key, release in self.pitched_notes:
+            entry[1] = "~" + self.key_table[key] if release else self.key_table[key]
+        self.log("Transposed by", f"{shift:+d}", "semitones to fit the virtual piano")
+
     def readEvents(self):
         while self.itr + 1 < len(self.bytes):
             for i in range(len(self.startCounter)):
@@ -772,6 +1702,116 @@ class MidiFile:
                 elif self.startCounter[1] == 4:
                     self.readMTrk()
 
+    def wants_parallel_decode(self, midi_file, parallel):
+        if parallel is False or not isinstance(midi_file, (str, os.PathLike)):
+            return False
+        if self.verbose or self.debug or self.record_file:
+            # The processing log must come out in file order.
+            return False
+        # Only the simultaneous tracks of a format 1 file are worth spreading over the pool.
+        header = bytes(self.bytes[:10])
+        if header[:4] != b"MThd" or int.from_bytes(header[8:10], "big") != 1:
+            return False
+        return bool(parallel) or (available_cpus() >= PARALLEL_PARSE_MIN_CPUS
+                                  and len(self.bytes) >= PARALLEL_PARSE_MIN_BYTES)
+
+    def readChunkTable(self):
+        """Walk the file exactly like readEvents, recording each MTrk chunk instead of decoding it."""
+        self.chunk_table = []
+        try:
+            self.readEvents()
+            return self.chunk_table
+        finally:
+            self.chunk_table = None
+
+    def readEventsParallel(self, path, force=False):
+        """Locate the track chunks, decode them in the parse pool and merge them in track order.
+
+        Workers map the file themselves, so only the decoded events travel
+        back. Running status carries over from one track to the next in
+        this parser, so a worker gives up on a track that starts without a
+        status byte and that track is decoded here with the real state.
+        """
+        chunks = self.readChunkTable()
+        pool = None
+        if force or len(chunks) >= PARALLEL_PARSE_MIN_TRACKS:
+            pool = get_parse_pool()
+        shared = (self.division, self.key_table, self.channel_enabled)
+        futures = [pool.submit(decode_midi_track_file, path, start, length, enabled, *shared) if pool else None
+                   for index, enabled, start, length in chunks]
+
+        state = (self.runningStatus, self.runningStatusSet)
+        try:
+            for (index, enabled, start, length), future in zip(chunks, futures):
+                result = self.wait_for_track(future) if future else None
+                if result is None:
+                    result = decode_midi_track(self.bytes, start, length, enabled, *shared,
+                                               status=state, cancel_check=self.cancel_check)
+                self.merge_track(index, enabled, result)
+                if result["status"][0] is not None:
+                    state = result["status"]
+        finally:
+            for future in futures:
+                if future:
+                    future.cancel()
+        self.runningStatus, self.runningStatusSet = state
+
+    def wait_for_track(self, future):
+        """Return a worker's decoded track, or None if the worker could not decode it."""
+        from concurrent.futures import TimeoutError as FutureTimeout
+        from concurrent.futures.process import BrokenProcessPool
+        while True:
+            try:
+                return future.result(timeout=0.05)
+            except FutureTimeout:
+                if self.cancel_check and self.cancel_check():
+                    raise MidiLoadCancelled()
+            except BrokenProcessPool as e:
+                print(f"[Debug] Parse pool failed, decoding here instead: {e}")
+                shutdown_parse_pool()
+                return None
+
+    def merge_track(self, index, enabled, result):
+        """Append one decoded track; clean_notes' stable sort then merges the per-track streams by time."""
+        self.track_index = index
+        self.track_enabled = enabled
+        self.notes.extend(result["notes"])
+        self.pitched_notes.extend(result["pitched_notes"])
+        self.text_events.extend(result["text_events"])
+        for key, count in enumerate(result["pitch_histogram"]):
+            if count:
+                self.pitch_histogram[key] += count
+        self.key_press_count += result["key_press_count"]
+        self.filtered_count += result["filtered_count"]
+        if result["tempo"] is not None:
+            self.tempo = result["tempo"]
+
+    @classmethod
+    def track_decoder(cls, data, division, key_table, channel_enabled):
+        """Return a bare MidiFile that decodes single track chunks of data with readMidiTrackEvent."""
+        decoder = cls.__new__(cls)
+        decoder.verbose = decoder.debug = False
+        decoder.record_file = None
+        decoder.cancel_check = None
+        decoder.midiRecord_list = []
+        decoder.bytes = data
+        decoder.itr = 0
+        decoder.division = division
+        decoder.key_table = key_table
+        decoder.channel_enabled = channel_enabled
+        decoder.track_enabled = True
+        decoder.runningStatus = -1
+        decoder.runningStatusSet = False
+        decoder.deltaTime = 0
+        decoder.tempo = None
+        decoder.key_press_count = 0
+        decoder.filtered_count = 0
+        decoder.pitch_histogram = [0] * 128
+        decoder.notes = []
+        decoder.pitched_notes = []
+        decoder.text_events = []
+        return decoder
+
     def log(self, *arg):
         if self.verbose or self.debug:
             for s in range(len(arg)):
@@ -784,7 +1824,7 @@ class MidiFile:
             print()
             if self.debug: input()
             self.midiRecord_list.append("\n")
-        else:
+        elif self.record_file:
             for s in range(len(arg)):
                 try:
                     self.midiRecord_list.append(str(arg[s]) + " ")
@@ -815,18 +1855,16 @@ class MidiFile:
             for x in self.notes:
                 print(x)
 
-        i = 0
-        while i < len(self.notes) - 1:
-            a_time, b_time = self.notes[i][0], self.notes[i + 1][0]
-            if a_time == b_time:
-                a_notes, b_notes = self.notes[i][1], self.notes[i + 1][1]
+        # Merge presses at the same time into one chord in a single pass.
+        merged = []
+        for note in self.notes:
+            if merged and merged[-1][0] == note[0]:
+                a_notes, b_notes = merged[-1][1], note[1]
                 if "tempo" not in a_notes and "tempo" not in b_notes and "~" not in a_notes and "~" not in b_notes:
-                    self.notes[i][1] += self.notes[i + 1][1]
-                    self.notes.pop(i + 1)
-                else:
-                    i += 1
-            else:
-                i += 1
+                    merged[-1][1] += b_notes
+                    continue
+            merged.append(note)
+        self.notes = merged
 
         for q in range(len(self.notes)):
             letterDict = {}
@@ -840,7 +1878,6 @@ class MidiFile:
         return
 
     def save_song(self, song_file):
-        import json
         print("Saving notes to", song_file)
         song_data = {
             "playback_speed": playback_speed,
@@ -850,12 +1887,9 @@ class MidiFile:
             json.dump(song_data, f, indent=2)
         return
 
-    def save_sheet(self, sheet_file):
-        import json
-        print("Saving sheets to", sheet_file)
+    def sheet_notes(self):
+        """Return the played notes as sheet tokens, with chords in brackets."""
         sheet_data = []
-        note_count = 0
-        
         for timing, notes in self.notes:
             if not "tempo" in notes and "~" not in notes:
                 if len(notes) > 1:
@@ -864,14 +1898,18 @@ class MidiFile:
                     note = notes
                 
                 sheet_data.append(note)
-                note_count += 1
+        return sheet_data
+
+    def save_sheet(self, sheet_file, sheet_data=None):
+        print("Saving sheets to", sheet_file)
+        if sheet_data is None:
+            sheet_data = self.sheet_notes()
         
         with codecs.open(sheet_file, "w", encoding='utf-8') as f:
             json.dump(sheet_data, f, indent=2)
         return
 
     def save_record(self, record_file):
-        import json
         try:
             print("Saving processing log to", record_file)
             with codecs.open(record_file, "w", encoding='utf-8') as f:
@@ -880,6 +1918,52 @@ class MidiFile:
             print(f"Warning: Could not save record file: {e}")
         return
 
+# --- Parallel Track Decoding ---
+def decode_midi_track(data, start, length, enabled, division, key_table, channel_enabled,
+                      status=None, cancel_check=None):
+    """Decode the MTrk chunk at data[start:start + length] into a dict of its events.
+
+    status is the (runningStatus, runningStatusSet) left by the previous
+    track. Without it the track is decoded as if that status were unknown
+    and None is returned if the track turns out to depend on it.
+    """
+    decoder = MidiFile.track_decoder(data, division, key_table, channel_enabled)
+    decoder.track_enabled = enabled
+    decoder.cancel_check = cancel_check
+    decoder.itr = start
+    if status is None:
+        # A data byte before any status byte reads this as its type and fails on it.
+        decoder.runningStatus, decoder.runningStatusSet = None, True
+    else:
+        decoder.runningStatus, decoder.runningStatusSet = status
+    try:
+        decoder.readMidiTrackEvent(length)
+    except TypeError:
+        if status is None:
+            return None
+        raise
+    return {
+        "notes": decoder.notes,
+        "pitched_notes": decoder.pitched_notes,
+        "text_events": decoder.text_events,
+        "pitch_histogram": decoder.pitch_histogram,
+        "key_press_count": decoder.key_press_count,
+        "filtered_count": decoder.filtered_count,
+        "tempo": decoder.tempo,
+        "status": (decoder.runningStatus, decoder.runningStatusSet),
+    }
+
+def decode_midi_track_file(path, start, length, enabled, division, key_table, channel_enabled):
+    """Parse pool entry point: map the file and decode one of its track chunks."""
+    with open(path, "rb") as f:
+        data, mapped = map_midi_file(f)
+    try:
+        return decode_midi_track(data, start, length, enabled, division, key_table, channel_enabled)
+    finally:
+        data.release()
+        if mapped is not None:
+            mapped.close()
+
 # --- MIDI Playback Functions ---
 def calculate_total_duration(notes):
     """Calculate the total duration of all notes."""
@@ -895,29 +1979,118 @@ def is_shifted(char_in):
         return True
     return False
 
+# --- Keystroke Rate Limiting ---
+def thin_chord(keys, keep):
+    """Keep the keep most important keys of a chord.
+
+    The top and bottom notes go first, then the remaining notes from high to
+    low, with octave doublings of pitch classes already kept dropped first.
+    The kept keys stay in their original order.
+    """
+    ordered = sorted(set(keys), key=lambda k: KEY_PITCH.get(k, -1))
+    if len(ordered) <= keep:
+        return keys
+    priority = [ordered[-1], ordered[0]]
+    classes = {KEY_PITCH.get(k, 0) % 12 for k in priority}
+    distinct = []
+    doublings = []
+    for key in reversed(ordered[1:-1]):
+        pitch_class = KEY_PITCH.get(key, 0) % 12
+        if pitch_class in classes:
+            doublings.append(key)
+        else:
+            distinct.append(key)
+            classes.add(pitch_class)
+    kept = set((priority + distinct + doublings)[:keep])
+    return "".join(k for k in keys if k in kept)
+
+def limit_keystroke_rate(notes, max_rate, window=KEYSTROKE_WINDOW, speed=1.0,
+                         section_length=KEYSTROKE_REPORT_SECTION):
+    """Thin chords so no sliding window of playback sends more than max_rate keys per second.
+
+    notes is a compiled [delay, keys] list as built by parse_midi_info; the
+    result has the same events in the same order, so indices into it stay
+    valid. A chord always keeps at least one key. Returns the new list and a
+    report with the kept and removed key counts per section of
+    section_length seconds at the given speed.
+    """
+    budget = max_rate * window
+    recent = deque()
+    in_window = 0
+    t = 0.0
+    limited = []
+    sections = {}
+    for delay, keys in notes:
+        if "~" not in keys and "tempo" not in keys:
+            while recent and recent[0][0] <= t - window:
+                in_window -= recent.popleft()[1]
+            if len(keys) > budget - in_window:
+                thinned = thin_chord(keys, max(1, int(budget - in_window)))
+            else:
+                thinned = keys
+            recent.append((t, len(thinned)))
+            in_window += len(thinned)
+
+            section = sections.setdefault(int(t // section_length), [0, 0])
+            section[0] += len(thinned)
+            section[1] += len(keys) - len(thinned)
+            keys = thinned
+        limited.append([delay, keys])
+        t += delay / speed
+
+    report = [{"start": i * section_length, "end": (i + 1) * section_length, "kept": kept, "removed": removed}
+              for i, (kept, removed) in sorted(sections.items())]
+    return limited, report
+
+def apply_keystroke_limit():
+    """Re-thin the loaded song for the current playback speed and report what was removed.
+
+    Below KEYSTROKE_LIMIT_MIN_SPEED the song is played as compiled.
+    """
+    compiled_notes = player.compiled_notes
+    if compiled_notes is None:
+        return
+    if not MAX_KEYSTROKES_PER_SECOND or playback_speed <= KEYSTROKE_LIMIT_MIN_SPEED:
+        player.set_notes(compiled_notes)
+        return
+
+    # Thin outside the player lock so a speed change never stalls the playing song.
+    limited, report = limit_keystroke_rate(compiled_notes, MAX_KEYSTROKES_PER_SECOND, speed=playback_speed)
+    with player.lock:
+        if player.compiled_notes is not compiled_notes:
+            return
+        player.set_notes(limited)
+    removed = sum(section["removed"] for section in report)
+    if removed:
+        print(f"[Debug] Keystroke limit {MAX_KEYSTROKES_PER_SECOND}/s at {playback_speed:.2f}x removed {removed} key(s):")
+        for section in report:
+            if section["removed"]:
+                print(f"[Debug]   {int(section['start'] // 60)}:{int(section['start'] % 60):02d}"
+                      f"-{int(section['end'] // 60)}:{int(section['end'] % 60):02d}"
+                      f" removed {section['removed']} of {section['kept'] + section['removed']}")
+        post_ui("status", text=f"Thinned {removed} key(s) to stay under {MAX_KEYSTROKES_PER_SECOND} keys/s")
+    return report
+
 def speed_up():
     """Increase playback speed."""
     global playback_speed, status_label, speed_label
-    playback_speed *= speedMultiplier
-    update_speed_display()
+    set_playback_speed(playback_speed * speedMultiplier)
     print(f"Speeding up: Playback speed is now {playback_speed:.2f}x")
-    if status_label:
-        status_label.config(text=f"Speed increased to {playback_speed:.2f}x")
+    post_ui("status", text=f"Speed increased to {playback_speed:.2f}x")
+    apply_keystroke_limit()
 
 def slow_down():
     """Decrease playback speed."""
     global playback_speed, status_label, speed_label
-    playback_speed /= speedMultiplier
-    update_speed_display()
+    set_playback_speed(playback_speed / speedMultiplier)
     print(f"Slowing down: Playback speed is now {playback_speed:.2f}x")
-    if status_label:
-        status_label.config(text=f"Speed decreased to {playback_speed:.2f}x")
+    post_ui("status", text=f"Speed decreased to {playback_speed:.2f}x")
+    apply_keystroke_limit()
 
 def update_speed_display():
     """Update speed display in UI"""
     global speed_label, playback_speed
-    if speed_label:
-        speed_label.config(text=f"{playback_speed:.2f}x")
+    post_ui("speed", text=f"{playback_speed:.2f}x")
 
 def press_letter(str_letter):
     """Press a key on the keyboard."""
@@ -961,25 +2134,20 @@ def release_letter(str_letter):
         print(f"[Debug] Error releasing key {str_letter}: {e}")
     return
 
-def process_midi_file():
+def process_midi_file(session_dir=None):
     """Process the song.json file created by MIDI conversion."""
     global playback_speed, speed_label
-    import json
     
-    temp_dir = get_temp_directory()
-    song_file = os.path.join(temp_dir, "song.json")
+    song_file = os.path.join(session_dir or get_session_directory(), "song.json")
     
     try:
         with open(song_file, "r") as macro_file:
             song_data = json.load(macro_file)
-            t_offset_set = False
-            t_offset = 0
             
             if "playback_speed" in song_data:
                 try:
-                    playback_speed = float(song_data["playback_speed"])
+                    set_playback_speed(float(song_data["playback_speed"]))
                     print("Playback speed is set to %.2f" % playback_speed)
-                    update_speed_display()
                 except ValueError:
                     print("Error: Invalid playback speed value")
                     return None
@@ -987,34 +2155,40 @@ def process_midi_file():
                 print("Error: Playback speed not found in JSON")
                 return None
 
-            tempo = None
-            processed_notes = []
-            
-            for note_entry in song_data["notes"]:
-                wait_to_press = float(note_entry[0])
-                notes = note_entry[1]
-                
-                if 'tempo' in notes:
-                    try:
-                        tempo = 60 / float(notes.split("=")[1])
-                    except ValueError:
-                        print("Error: Invalid tempo value")
-                        return None
-                
-                processed_notes.append([wait_to_press, notes])
-                if not t_offset_set:
-                    t_offset = wait_to_press
-                    t_offset_set = True
+        return compile_song(song_data["notes"])
+    except Exception as e:
+        print(f"Error processing MIDI file: {e}")
+        return None
 
-            if tempo is None:
-                print("Error: Tempo not specified")
+def compile_song(note_entries):
+    """Build the [tempo, t_offset, notes, tempo_changes] playback tuple from [beats, keys] entries."""
+    t_offset_set = False
+    t_offset = 0
+    tempo = None
+    processed_notes = []
+    
+    for note_entry in note_entries:
+        wait_to_press = float(note_entry[0])
+        notes = note_entry[1]
+        
+        if 'tempo' in notes:
+            try:
+                tempo = 60 / float(notes.split("=")[1])
+            except ValueError:
+                print("Error: Invalid tempo value")
                 return None
+        
+        processed_notes.append([wait_to_press, notes])
+        if not t_offset_set:
+            t_offset = wait_to_press
+            t_offset_set = True
 
-        return [tempo, t_offset, processed_notes, []]
-    except Exception as e:
-        print(f"Error processing MIDI file: {e}")
+    if tempo is None:
+        print("Error: Tempo not specified")
         return None
 
+    return [tempo, t_offset, processed_notes, []]
+
 def floor_to_zero(i):
     """Ensure a value is not negative."""
     if i > 0:
@@ -1022,59 +2196,366 @@ def floor_to_zero(i):
     else:
         return 0
 
-def parse_midi_info():
-    """Parse the MIDI info for playback."""
-    global infoTuple
-    tempo = infoTuple[0]
-    notes = infoTuple[2][1:]
-    
-    i = 0
-    while i < len(notes) - 1:
-        note = notes[i]
-        next_note = notes[i + 1]
-        if "tempo" in note[1]:
-            tempo = 60 / float(note[1].split("=")[1])
-            notes.pop(i)
-
-            note = notes[i]
-            if i < len(notes) - 1:
-                next_note = notes[i + 1]
-        else:
-            note[0] = (next_note[0] - note[0]) * tempo
-            i += 1
-
-    notes[len(notes) - 1][0] = 1.00
-
-    return notes
-
-def adjust_tempo_for_current_note():
-    """Adjust tempo for the current note if needed."""
-    global isPlaying, storedIndex, playback_speed, elapsedTime, legitModeActive, speed_label
-    if len(infoTuple) > 3:
-        tempo_changes = infoTuple[3]
-
-        for change in tempo_changes:
-            if change[0] == storedIndex:
-                new_tempo = change[1]
-                playback_speed = new_tempo / origionalPlaybackSpeed
-                update_speed_display()
-                print(f"Tempo changed: New playback speed is {playback_speed:.2f}x")
-
-def play_next_midi_note():
-    """Plays the next MIDI note based on the current state."""
-    global isPlaying, storedIndex, playback_speed, elapsedTime, legitModeActive, heldNotes
-    global next_notes_display_widget, autoplay_button, status_label
+def parse_midi_info(info=None):
+    """Parse the MIDI info for playback, using the loaded song unless info is given.
+
+    Turns the [beats, keys] entries into [seconds until the next event, keys].
+    Beats are converted to seconds over the whole tempo map, so each tempo
+    change applies from its own beat on; before the first one the MIDI
+    default of 120 bpm applies.
+    """
+    with profile_stage("parse_midi_info"):
+        if info is None:
+            info = player.info
+        seconds_per_beat = 0.5
+        last_beat = info[2][0][0] if info[2] else 0.0
+        elapsed = onset = 0.0
+        notes = []
+        for note in info[2]:
+            elapsed += (note[0] - last_beat) * seconds_per_beat
+            last_beat = note[0]
+            if "tempo" in note[1]:
+                seconds_per_beat = 60 / float(note[1].split("=")[1])
+                continue
+            if notes:
+                notes[-1][0] = elapsed - onset
+            onset = elapsed
+            notes.append(note)
+
+        if notes:
+            notes[-1][0] = 1.00
+
+        return notes
+
+class PlaybackClock:
+    """Maps media time (song seconds at 1x speed) to wall-clock time.
+
+    The clock is anchored at a (media, wall) pair and advances at rate.
+    Changing the rate, pausing or seeking re-anchors it at the current media
+    position, so every deadline kept in media time is re-timed at once.
+    """
+
+    def __init__(self, rate=1.0):
+        self.rate = rate
+        self.paused = True
+        self.anchor_media = 0.0
+        self.anchor_wall = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def _media_at(self, wall):
+        if self.paused:
+            return self.anchor_media
+        return self.anchor_media + (wall - self.anchor_wall) * self.rate
+
+    def media_now(self):
+        """Return the current media position in seconds."""
+        with self.lock:
+            return self._media_at(time.perf_counter())
+
+    def wall_delay(self, media_time):
+        """Return the wall-clock seconds until media_time is reached, or None while paused."""
+        with self.lock:
+            if self.paused:
+                return None
+            now = time.perf_counter()
+            return max(0.0, (media_time - self._media_at(now)) / self.rate)
+
+    def set_rate(self, rate):
+        """Change speed from the current media position on."""
+        with self.lock:
+            now = time.perf_counter()
+            self.anchor_media = self._media_at(now)
+            self.anchor_wall = now
+            self.rate = rate
+
+    def pause(self):
+        """Freeze the clock at the current media position."""
+        with self.lock:
+            now = time.perf_counter()
+            self.anchor_media = self._media_at(now)
+            self.anchor_wall = now
+            self.paused = True
+
+    def resume(self):
+        """Continue from the media position where the clock was paused."""
+        with self.lock:
+            if self.paused:
+                self.anchor_wall = time.perf_counter()
+                self.paused = False
+
+    def seek(self, media_time):
+        """Jump to media_time, keeping the paused state."""
+        with self.lock:
+            self.anchor_media = media_time
+            self.anchor_wall = time.perf_counter()
+
+def song_position(notes, index):
+    """Return the media time, in seconds at 1x, at which the event at index starts."""
+    return sum(floor_to_zero(note[0]) for note in notes[:index])
+
+class KeyStateEngine:
+    """Tracks held keys with per-key reference counts and a heap of release deadlines.
+
+    Every press opens a hold that ends either at its deadline or at a note-off
+    for that key, whichever comes first. A key is only released once its last
+    hold ends, so an older release can no longer cut off a newer press of the
+    same key. The playback thread calls release_due() instead of running a
+    timer thread per chord.
+    """
+
+    def __init__(self, press, release):
+        self.press_output = press
+        self.release_output = release
+        self.counts = {}
+        self.holds = {}
+        self.deadlines = []
+        self.sequence = itertools.count()
+
+    def press(self, key, deadline):
+        """Press key (re-triggering it if already held) and hold it until deadline."""
+        self.press_output(key)
+        hold = [key, True]
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.holds.setdefault(key, deque()).append(hold)
+        heapq.heappush(self.deadlines, (deadline, next(self.sequence), hold))
+
+    def note_off(self, key):
+        """End the oldest active hold of key, as a MIDI note-off does."""
+        holds = self.holds.get(key)
+        if holds:
+            self._end_hold(holds[0])
+
+    def _end_hold(self, hold):
+        if not hold[1]:
+            return
+        hold[1] = False
+        key = hold[0]
+        self.holds[key].remove(hold)
+        self.counts[key] -= 1
+        if self.counts[key] == 0:
+            del self.counts[key]
+            del self.holds[key]
+            self.release_output(key)
+
+    def release_due(self, now):
+        """Release holds whose deadline has passed and return the next deadline, or None."""
+        deadlines = self.deadlines
+        while deadlines and deadlines[0][0] <= now:
+            self._end_hold(heapq.heappop(deadlines)[2])
+        while deadlines and not deadlines[0][2][1]:
+            heapq.heappop(deadlines)
+        return deadlines[0][0] if deadlines else None
+
+    def release_all(self):
+        """Release every held key, e.g. when playback stops."""
+        for key in list(self.counts):
+            self.release_output(key)
+        self.counts.clear()
+        self.holds.clear()
+        self.deadlines.clear()
+
+    def is_held(self, key):
+        return key in self.counts
+
+
+def show_upcoming_notes(notes, index):
+    """Show the notes after index in the next-notes box. Runs on the Tk thread."""
+    next_notes_display_widget.config(state="normal")
+    next_notes_display_widget.delete("1.0", tk.END)
+    
+    upcoming_notes = ""
+    look_ahead = 10
+    for i in range(index + 1, min(index + look_ahead + 1, len(notes))):
+        if "tempo" not in notes[i][1] and "~" not in notes[i][1]:
+            if len(notes[i][1]) > 1:
+                upcoming_notes += "[" + notes[i][1] + "] "
+            else:
+                upcoming_notes += notes[i][1] + " "
+            
+    next_notes_display_widget.insert(tk.END, upcoming_notes)
+    next_notes_display_widget.config(state="disabled")
+
+# --- Player ---
+class Player:
+    """Owns the loaded song, the play position and the thread that plays it.
+
+    Every start and stop bumps generation. A playback thread is handed the
+    generation it was started for and only touches keys or the position while
+    holding lock with that generation still current, so a thread left over
+    from an earlier start exits without pressing anything and at most one
+    playback chain is ever active.
+    """
+
+    def __init__(self, press, release, speed=1.0):
+        self.lock = threading.RLock()
+        self.keys = KeyStateEngine(press, release)
+        self.clock = PlaybackClock(speed)
+        self.info = None
+        self.compiled_notes = None
+        self.path = None
+        self.total_duration = 0.0
+        self.playing = False
+        self.index = 0
+        self.elapsed = 0.0
+        self.next_media_time = 0.0
+        self.generation = 0
+        self.wakeup = threading.Event()
+        self.thread = None
+
+    def load(self, info, path=None):
+        """Stop playback and make info the current song, positioned at its start."""
+        with self.lock:
+            self.stop()
+            self._install(info, path)
+
+    def _install(self, info, path):
+        # The caller's list stays untouched when the keystroke limit swaps in a thinned note list.
+        self.info = list(info)
+        self.compiled_notes = info[2]
+        self.path = path
+        self.set_notes(info[2])
+        self.seek(0)
+
+    def set_notes(self, notes):
+        """Swap in a re-timed or thinned note list of the same length for the loaded song."""
+        with self.lock:
+            self.info[2] = notes
+            self.total_duration = calculate_total_duration(notes)
+            self.wakeup.set()
+
+    def start(self):
+        """Play from the current position. Returns False if no song is loaded."""
+        with self.lock:
+            if self.playing:
+                return True
+            if not self.info:
+                return False
+            self.playing = True
+            self.generation += 1
+            self.wakeup = threading.Event()
+            self.thread = threading.Thread(target=self._run, args=(self.generation, self.wakeup),
+                                           name=f"playback-{self.generation}", daemon=True)
+            self.thread.start()
+            return True
+
+    def stop(self):
+        """Stop playing and release every held key; the playback thread exits on its own."""
+        with self.lock:
+            if not self.playing:
+                return
+            self.playing = False
+            self.generation += 1
+            self.clock.pause()
+            self.keys.release_all()
+            self.wakeup.set()
+
+    def toggle(self):
+        """Start or stop playback and return whether it is playing now."""
+        with self.lock:
+            if self.playing:
+                self.stop()
+            else:
+                self.start()
+            return self.playing
+
+    def seek(self, index):
+        """Move to the event at index, keeping the playing state."""
+        with self.lock:
+            self.index = index
+            self.keys.release_all()
+            self.next_media_time = song_position(self.info[2], index) if self.info else 0.0
+            self.elapsed = self.next_media_time
+            self.clock.seek(self.next_media_time)
+            self.wakeup.set()
+
+    def set_rate(self, speed):
+        """Change speed; held keys and the next event are re-timed at once."""
+        self.clock.set_rate(speed)
+        self.wakeup.set()
+
+    def _run(self, generation, wakeup):
+        with profile_stage("playback"), low_jitter_playback():
+            with self.lock:
+                if generation != self.generation:
+                    return
+                # Start the clock only once the thread is set up, so the setup never counts as lag.
+                self.clock.resume()
+            while True:
+                with self.lock:
+                    if generation != self.generation:
+                        return
+                    wait = self._step()
+                if wait is None:
+                    if not self._advance(generation):
+                        return
+                elif wait > 0:
+                    wakeup.wait(wait)
+                    wakeup.clear()
+
+    def _step(self):
+        """Release due keys and play the next event if it is due. Runs with lock held.
+
+        Returns the wall-clock seconds to wait, or None at the end of the song.
+        Events and release deadlines are kept in media time and converted
+        through clock on every wait, so speed changes apply to everything
+        already scheduled.
+        """
+        media_now = self.clock.media_now()
+        next_release = self.keys.release_due(media_now)
+        if media_now < self.next_media_time:
+            target = self.next_media_time
+            if next_release is not None:
+                target = min(target, next_release)
+            return self.clock.wall_delay(target)
+
+        notes = self.info[2]
+        if self.index >= len(notes):
+            self.keys.release_all()
+            return None
+
+        # If we fell far behind (e.g. after a stall), hold the song back instead of rushing to catch up.
+        if media_now - self.next_media_time > MAX_SCHEDULE_LAG * self.clock.rate:
+            self.clock.seek(self.next_media_time)
+
+        self._apply_tempo_change()
+        with profile_stage("playback_event"):
+            delay = self._play_event(self.index, notes, self.next_media_time)
+        self.index += 1
+        self.next_media_time += delay
+        return 0
 
-    if not isPlaying:
-        return
+    def _advance(self, generation):
+        """Switch to the next playlist song at the end of the current one. Returns True if playback goes on."""
+        job = next_playlist_job(lambda: generation == self.generation)
+        with self.lock:
+            if generation != self.generation:
+                return False
+            if job is None:
+                self.stop()
+                self.seek(0)
+                post_ui("autoplay", text="Start Autoplay")
+                post_ui("status", text="Playback complete")
+                return False
+            file_path, info, sheet_content = job.result
+            self._install(info, file_path)
+        apply_keystroke_limit()
+        threading.Thread(target=job.save_session_files, args=(job.song,), daemon=True).start()
+        prefetch_next_song()
+
+        print(f"[Debug] Playlist advanced to {os.path.basename(file_path)}")
+        post_ui_call("playlist_song", show_playlist_song, file_path, sheet_content)
+        return True
 
-    adjust_tempo_for_current_note()
-    
-    notes = infoTuple[2]
-    total_duration = calculate_total_duration(notes)
+    def _apply_tempo_change(self):
+        if len(self.info) > 3:
+            for change in self.info[3]:
+                if change[0] == self.index:
+                    set_playback_speed(change[1] / origionalPlaybackSpeed)
+                    print(f"Tempo changed: New playback speed is {playback_speed:.2f}x")
 
-    if isPlaying and storedIndex < len(notes):
-        note_info = notes[storedIndex]
+    def _play_event(self, index, notes, media_time):
+        """Play the note event at index, due at media_time, and return the media delay until the next one."""
+        note_info = notes[index]
         delay = floor_to_zero(note_info[0])
         note_keys = note_info[1]
         
@@ -1086,115 +2567,77 @@ def play_next_midi_note():
                 if random.random() < 0.5 and len(note_keys) > 1:
                     note_keys = note_keys[1:]
                 else:
-                    if storedIndex == 0 or notes[storedIndex - 1][0] > 0.3:
+                    if index == 0 or notes[index - 1][0] > 0.3:
                         delay += random.uniform(0.1, 0.5)
 
-        elapsedTime += delay
+        self.elapsed = media_time + delay
 
         if next_notes_display_widget:
-            next_notes_display_widget.config(state="normal")
-            next_notes_display_widget.delete("1.0", tk.END)
-            
-            upcoming_notes = ""
-            look_ahead = 10
-            for i in range(storedIndex + 1, min(storedIndex + look_ahead + 1, len(notes))):
-                if "tempo" not in notes[i][1] and "~" not in notes[i][1]:
-                    if len(notes[i][1]) > 1:
-                        upcoming_notes += "[" + notes[i][1] + "] "
-                    else:
-                        upcoming_notes += notes[i][1] + " "
-                    
-            next_notes_display_widget.insert(tk.END, upcoming_notes)
-            next_notes_display_widget.config(state="disabled")
+            post_ui_call("next_notes", show_upcoming_notes, notes, index)
 
         if "~" in note_keys:
             for n in note_keys.replace("~", ""):
-                release_letter(n)
-                if n in heldNotes:
-                    del heldNotes[n]
+                self.keys.note_off(n)
         else:
+            release_at = media_time + note_info[0]
             for n in note_keys:
-                press_letter(n)
-                heldNotes[n] = note_info[0]
+                self.keys.press(n, release_at)
 
-            threading.Timer(note_info[0] / playback_speed, release_held_notes, [note_keys]).start()
-
-        if "~" not in note_keys:
-            elapsed_mins, elapsed_secs = divmod(elapsedTime, 60)
-            total_mins, total_secs = divmod(total_duration, 60)
+            elapsed_mins, elapsed_secs = divmod(self.elapsed, 60)
+            total_mins, total_secs = divmod(self.total_duration, 60)
             progress_text = f"[{int(elapsed_mins)}m {int(elapsed_secs)}s/{int(total_mins)}m {int(total_secs)}s] {note_keys}"
             print(progress_text)
             
-            if status_label:
-                status_label.config(text=f"Playing: {note_keys} ({int(elapsed_mins)}:{int(elapsed_secs):02d}/{int(total_mins)}:{int(total_secs):02d})")
+            post_ui("status", text=f"Playing: {note_keys} ({int(elapsed_mins)}:{int(elapsed_secs):02d}/{int(total_mins)}:{int(total_secs):02d})")
 
-        storedIndex += 1
-        if delay == 0:
-            play_next_midi_note()
-        else:
-            threading.Timer(delay / playback_speed, play_next_midi_note).start()
-    elif storedIndex >= len(notes):
-        isPlaying = False
-        storedIndex = 0
-        elapsedTime = 0
-        if autoplay_button:
-            autoplay_button.config(text="Start Autoplay")
-        if status_label:
-            status_label.config(text="Playback complete")
+        return delay
+
+player = Player(press_letter, release_letter, playback_speed)
+
+def set_playback_speed(speed):
+    """Set the playback speed; the playing song picks it up from its next event."""
+    global playback_speed
+    playback_speed = speed
+    player.set_rate(speed)
+    update_speed_display()
 
-def release_held_notes(note_keys):
-    """Release keys that have been held down for their duration."""
-    global heldNotes
-    for n in note_keys:
-        if n in heldNotes:
-            release_letter(n)
-            if n in heldNotes:
-                del heldNotes[n]
+def seek_to_index(index):
+    """Move playback to the event at index."""
+    player.seek(index)
 
 def rewind():
     """Rewind playback by 10 notes."""
-    global storedIndex, status_label
-    if storedIndex - 10 < 0:
-        storedIndex = 0
-    else:
-        storedIndex -= 10
-    print(f"Rewound to note {storedIndex}")
-    if status_label:
-        status_label.config(text=f"Rewound to note {storedIndex}")
+    seek_to_index(max(0, player.index - 10))
+    print(f"Rewound to note {player.index}")
+    post_ui("status", text=f"Rewound to note {player.index}")
 
 def skip():
     """Skip forward by 10 notes."""
-    global storedIndex, isPlaying, status_label
-    if storedIndex + 10 > len(infoTuple[2]):
-        isPlaying = False
-        storedIndex = 0
-    else:
-        storedIndex += 10
-    print(f"Skipped to note {storedIndex}")
-    if status_label:
-        status_label.config(text=f"Skipped to note {storedIndex}")
+    with player.lock:
+        if not player.info:
+            return
+        if player.index + 10 > len(player.info[2]):
+            player.stop()
+            seek_to_index(0)
+            post_ui("autoplay", text="Start Autoplay")
+        else:
+            seek_to_index(player.index + 10)
+    print(f"Skipped to note {player.index}")
+    post_ui("status", text=f"Skipped to note {player.index}")
 
 def toggle_autoplay():
     """Toggle autoplay on or off."""
-    global isPlaying, autoplay_button, status_label
-    isPlaying = not isPlaying
-    
-    if autoplay_button:
-        if isPlaying:
-            autoplay_button.config(text="Stop Autoplay")
-            if status_label:
-                status_label.config(text="Playing MIDI file...")
-            play_next_midi_note()
-        else:
-            autoplay_button.config(text="Start Autoplay")
-            if status_label:
-                status_label.config(text="Autoplay stopped")
+    if player.toggle():
+        print("Starting autoplay...")
+        post_ui("autoplay", text="Stop Autoplay")
+        post_ui("status", text="Playing MIDI file...")
+    elif not player.info:
+        print("[Debug] toggle_autoplay: No MIDI song loaded")
+        post_ui("status", text="Load a MIDI file first")
     else:
-        if isPlaying:
-            print("Starting autoplay...")
-            play_next_midi_note()
-        else:
-            print("Stopping autoplay...")
+        print("Stopping autoplay...")
+        post_ui("autoplay", text="Start Autoplay")
+        post_ui("status", text="Autoplay stopped")
 
 def handle_midi_keypress(key):
     """Handle keyboard shortcuts for MIDI playback."""
@@ -1209,20 +2652,245 @@ def handle_midi_keypress(key):
             speed_up()
         elif key == keyboard.Key.page_down:
             slow_down()
+        elif key == PROFILE_HOTKEY:
+            toggle_profiling()
     except AttributeError:
         pass
     return True
 
+def iter_sheet_lines(sheet_data):
+    """Yield the sheet text line by line: 8 notes per line and a blank gap every 32 notes."""
+    for start in range(0, len(sheet_data), 8):
+        group = sheet_data[start:start + 8]
+        line = " ".join(group) + " "
+        if len(group) == 8:
+            line += "\n"
+            if (start + 8) % 32 == 0:
+                line += "\n\n"
+        yield line
+
+def format_sheet(sheet_data):
+    """Format sheet tokens as the text shown in the music input box."""
+    return "".join(iter_sheet_lines(sheet_data))
+
+def insert_text_in_chunks(widget, text, chunk_size=None):
+    """Replace the widget text, inserting large texts a chunk per idle callback.
+
+    The first chunk appears immediately and the UI stays responsive while
+    the rest streams in. A later call abandons an insertion still in progress.
+    """
+    global sheet_insert_generation
+    sheet_insert_generation += 1
+    generation = sheet_insert_generation
+    chunk_size = chunk_size or SHEET_CHUNK_CHARS
+    widget.delete("1.0", tk.END)
+
+    def insert_from(start):
+        if generation != sheet_insert_generation:
+            return
+        end = start + chunk_size
+        if end < len(text):
+            newline = text.rfind("\n", start, end)
+            if newline > start:
+                end = newline + 1
+        widget.insert(tk.END, text[start:end])
+        if end < len(text):
+            if root:
+                root.after_idle(insert_from, end)
+            else:
+                insert_from(end)
+
+    insert_from(0)
+
+# --- Song Store ---
+def estimate_song_bytes(info, notes, sheet_data, sheet_content):
+    """Roughly estimate the memory held by a compiled song and its source notes and sheet."""
+    size = sys.getsizeof(sheet_content) + sys.getsizeof(sheet_data) + sum(sys.getsizeof(t) for t in sheet_data)
+    for note_list in (info[2], notes):
+        size += sys.getsizeof(note_list)
+        for note in note_list:
+            size += sys.getsizeof(note) + sys.getsizeof(note[0]) + sys.getsizeof(note[1])
+    return size
+
+class SongStore:
+    """Keeps recently loaded songs compiled in memory, evicting the least recently used over a byte budget."""
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.songs = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key_for(file_path):
+        """Return the cache key of a MIDI file: its path, stat signature and current load options."""
+        st = os.stat(file_path)
+        excluded = frozenset(track_filters.get(os.path.basename(file_path), ()))
+        return (os.path.realpath(file_path), st.st_mtime_ns, st.st_size, excluded, AUTO_TRANSPOSE)
+
+    def get(self, key):
+        with self.lock:
+            song = self.songs.get(key)
+            if song is not None:
+                self.songs.move_to_end(key)
+            return song
+
+    def put(self, key, song):
+        """Store a song dict with a "bytes" entry; songs larger than the whole budget are not kept."""
+        with self.lock:
+            old = self.songs.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old["bytes"]
+            if song["bytes"] > self.budget_bytes:
+                return
+            self.songs[key] = song
+            self.total_bytes += song["bytes"]
+            while self.total_bytes > self.budget_bytes:
+                _, evicted = self.songs.popitem(last=False)
+                self.total_bytes -= evicted["bytes"]
+                print(f"[Debug] Song store evicted {os.path.basename(evicted['file_path'])}")
+
+    def clear(self):
+        with self.lock:
+            self.songs.clear()
+            self.total_bytes = 0
+
+def get_song_store():
+    """Get the shared in-memory song store."""
+    global song_store
+    if song_store is None:
+        song_store = SongStore(SONG_STORE_BYTES)
+    return song_store
+
+class MidiLoadJob:
+    """Parses, compiles and renders a MIDI file on a background thread.
+
+    stage moves through parse, compile and render. Nothing here touches Tk;
+    the Tk thread polls the job and applies result once it is finished.
+    cancel() stops the job at the next check, including in the middle of
+    parsing a track.
+    """
+
+    STAGES = ("parse", "compile", "render")
+
+    def __init__(self, file_path, save_session=True):
+        self.file_path = file_path
+        self.save_session = save_session
+        self.stage = "queued"
+        self.result = None
+        self.song = None
+        self.error = None
+        self.finished = False
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    def wait(self, timeout=None):
+        """Wait for the job to finish; returns True once it has."""
+        return self._done.wait(timeout)
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def progress_text(self):
+        name = os.path.basename(self.file_path)
+        if self.stage in self.STAGES:
+            return f"Loading {name}: {self.stage} ({self.STAGES.index(self.stage) + 1}/{len(self.STAGES)})..."
+        return f"Loading {name}..."
+
+    def check(self):
+        if self.cancelled:
+            raise MidiLoadCancelled()
+
+    def run(self):
+        with profile_stage("load"):
+            try:
+                file_path = self.file_path
+
+                if not file_path.startswith(get_midi_directory()):
+                    dest_file = os.path.join(get_midi_directory(), os.path.basename(file_path))
+                    if not os.path.exists(dest_file):
+                        shutil.copy2(file_path, dest_file)
+                        notify_midi_file_added(os.path.basename(dest_file))
+                    file_path = dest_file
+
+                store = get_song_store()
+                key = store.key_for(file_path)
+                self.song = store.get(key)
+                if self.song is not None:
+                    print(f"[Debug] Loaded {os.path.basename(file_path)} from the song store")
+                    self.result = (file_path, self.song["info"], self.song["sheet_content"])
+                    self.stage = "done"
+                    return
+
+                self.stage = "parse"
+                midi = MidiFile(file_path, cancel_check=self._cancel.is_set,
+                                exclude_tracks=track_filters.get(os.path.basename(file_path), ()))
+                if not midi.success:
+                    self.error = "Failed to process the MIDI file"
+                    return
+                print(f"[Debug] Parsed {os.path.basename(file_path)}: {midi.key_press_count} notes, "
+                      f"{midi.filtered_count} filtered, transposed {midi.transposition:+d}")
+                self.check()
+
+                self.stage = "compile"
+                info = compile_song(midi.notes)
+                if info is None:
+                    self.error = "Failed to process the MIDI file"
+                    return
+                info[2] = parse_midi_info(info)
+                self.check()
+
+                self.stage = "render"
+                sheet_data = midi.sheet_notes()
+                sheet_content = format_sheet(sheet_data)
+                self.check()
+
+                self.song = {"file_path": file_path, "info": info, "notes": midi.notes, "sheet_data": sheet_data,
+                             "sheet_content": sheet_content,
+                             "bytes": estimate_song_bytes(info, midi.notes, sheet_data, sheet_content)}
+                store.put(key, self.song)
+                self.result = (file_path, info, sheet_content)
+                self.stage = "done"
+            except MidiLoadCancelled:
+                self.stage = "cancelled"
+            except Exception as e:
+                self.error = str(e)
+            finally:
+                # Whoever waits for the job may use the session files, so they are written first.
+                if self.song is not None and self.save_session:
+                    self.save_session_files(self.song)
+                self.finished = True
+                self._done.set()
+
+    def save_session_files(self, song):
+        """Write song.json and the sheet into this instance's session directory for the next start."""
+        session_dir = get_session_directory()
+        try:
+            with codecs.open(os.path.join(session_dir, "song.json"), "w", encoding='utf-8') as f:
+                json.dump({"playback_speed": playback_speed, "notes": song["notes"]}, f, indent=2)
+            with codecs.open(os.path.join(session_dir, "sheetConversion.json"), "w", encoding='utf-8') as f:
+                json.dump(song["sheet_data"], f, indent=2)
+        except Exception as e:
+            print(f"[Debug] Could not save session files: {e}")
+
 def load_midi_file(file_path=None):
-    """Load and process a MIDI file."""
-    global infoTuple, isPlaying, storedIndex, elapsedTime, status_label
-    import json
+    """Load and process a MIDI file on a background worker.
+
+    Starting a new load supersedes one that is still running.
+    """
+    global status_label, load_job
     
-    isPlaying = False
-    storedIndex = 0
-    elapsedTime = 0
-    if autoplay_button:
-        autoplay_button.config(text="Start Autoplay")
+    player.stop()
+    seek_to_index(0)
+    post_ui("autoplay", text="Start Autoplay")
     
     if not file_path:
         file_path = filedialog.askopenfilename(
@@ -1233,96 +2901,199 @@ def load_midi_file(file_path=None):
     if not file_path:
         return
 
+    if load_job and not load_job.finished:
+        load_job.cancel()
+
+    load_job = MidiLoadJob(file_path)
+    post_ui("status", text=load_job.progress_text())
+
+    if root:
+        load_job.start()
+        post_ui("load_button", text="Cancel Load")
+        post_ui_call("load_progress", poll_load_progress, load_job)
+    else:
+        load_job.run()
+        finish_midi_load(load_job)
+
+def poll_load_progress(job):
+    """Show load progress on the Tk thread and apply the result when the job finishes."""
+    if job is not load_job:
+        return
+    if job.finished:
+        finish_midi_load(job)
+        return
     if status_label:
-        status_label.config(text=f"Loading MIDI file: {os.path.basename(file_path)}...")
+        status_label.config(text=job.progress_text())
+    root.after(LOAD_POLL_MS, poll_load_progress, job)
 
-    try:
-        temp_dir = get_temp_directory()
-        song_file = os.path.join(temp_dir, "song.json")
-        sheet_file = os.path.join(temp_dir, "sheetConversion.json")
-        
-        if not file_path.startswith(get_midi_directory()):
-            midi_dir = get_midi_directory()
-            dest_file = os.path.join(midi_dir, os.path.basename(file_path))
-            if not os.path.exists(dest_file):
-                shutil.copy2(file_path, dest_file)
-                if status_label:
-                    status_label.config(text=f"Imported MIDI file: {os.path.basename(file_path)}")
-            file_path = dest_file
-        
-        midi = MidiFile(file_path)
-        if midi.success:
-            midi.save_song(song_file)
-            midi.save_sheet(sheet_file)
-            
-            with open(sheet_file, "r") as f:
-                sheet_data = json.load(f)
-                sheet_content = ""
-                note_count = 0
-                
-                for note in sheet_data:
-                    sheet_content += f"{note} "
-                    note_count += 1
-                    if note_count % 8 == 0:
-                        sheet_content += "\n"
-                    if note_count % 32 == 0:
-                        sheet_content += "\n\n"
-                
-                if piano_music_input_widget:
-                    piano_music_input_widget.delete("1.0", tk.END)
-                    piano_music_input_widget.insert(tk.INSERT, sheet_content)
-            
-            infoTuple = process_midi_file()
-            if infoTuple is None:
-                if status_label:
-                    status_label.config(text="Error: Failed to process the MIDI file")
-                return
-                
-            infoTuple[2] = parse_midi_info()
-            refresh_midi_list()
-            if status_label:
-                status_label.config(text=f"MIDI file loaded: {os.path.basename(file_path)}")
-        else:
-            if status_label:
-                status_label.config(text="Error: Failed to process the MIDI file")
-    except Exception as e:
+def finish_midi_load(job):
+    """Apply a finished load job to the widgets and playback state. Runs on the Tk thread."""
+    if load_midi_button:
+        load_midi_button.config(text="Load Selected")
+
+    if job.result is None:
         if status_label:
-            status_label.config(text=f"Error: {str(e)}")
+            if job.cancelled:
+                status_label.config(text=f"Cancelled loading {os.path.basename(job.file_path)}")
+            else:
+                status_label.config(text=f"Error: {job.error}")
+        return
+
+    file_path, info, sheet_content = job.result
+    if piano_music_input_widget:
+        insert_text_in_chunks(piano_music_input_widget, sheet_content)
+
+    player.load(info, file_path)
+    update_speed_display()
+    if status_label:
+        status_label.config(text=f"MIDI file loaded: {os.path.basename(file_path)}")
+    apply_keystroke_limit()
+
+# --- Playlist ---
+def queue_selected_midi():
+    """Add the selected MIDI file to the end of the playlist and start prefetching."""
+    global midi_listbox, status_label, current_midi_files
+    if not midi_listbox:
+        return
+
+    selection = midi_listbox.curselection()
+    if not selection or selection[0] >= len(current_midi_files):
+        if status_label:
+            status_label.config(text="Please select a MIDI file to queue")
+        return
+
+    selected_file = current_midi_files[selection[0]]
+    with playlist_lock:
+        playlist.append(os.path.join(get_midi_directory(), selected_file))
+        queued = len(playlist)
+    prefetch_next_song()
+    if status_label:
+        status_label.config(text=f"Queued {selected_file} ({queued} in playlist)")
+
+def clear_playlist():
+    """Empty the playlist and stop any prefetch in progress."""
+    global prefetch_job
+    with playlist_lock:
+        playlist.clear()
+        if prefetch_job:
+            prefetch_job.cancel()
+        prefetch_job = None
+    if status_label:
+        status_label.config(text="Playlist cleared")
+
+def prefetch_next_song():
+    """Parse and compile the next playlist song in the background, keeping at most one prefetched.
+
+    The result lands in the song store, so prefetched memory stays within its byte budget.
+    """
+    global prefetch_job
+    with playlist_lock:
+        if not playlist:
+            return
+        if prefetch_job and prefetch_job.file_path == playlist[0]:
+            return
+        if prefetch_job:
+            prefetch_job.cancel()
+        prefetch_job = MidiLoadJob(playlist[0], save_session=False).start()
+
+def next_playlist_job(still_wanted):
+    """Take the next playable playlist song and return its finished load job, or None.
+
+    Runs on the playback thread at the end of a song. Once still_wanted() is
+    False it gives up and puts the song back at the front of the playlist.
+    """
+    global prefetch_job
+    while True:
+        with playlist_lock:
+            if not playlist:
+                return None
+            file_path = playlist.pop(0)
+            job = prefetch_job if prefetch_job and prefetch_job.file_path == file_path else None
+            prefetch_job = None
+
+        if job is None:
+            job = MidiLoadJob(file_path, save_session=False).start()
+        # Wait in short steps so a stop or toggle never blocks on a slow parse.
+        while not job.wait(0.05):
+            if not still_wanted():
+                job.cancel()
+                with playlist_lock:
+                    playlist.insert(0, file_path)
+                return None
+
+        if job.result is not None:
+            return job
+        print(f"[Debug] Skipping {os.path.basename(file_path)} in playlist: {job.error or job.stage}")
+
+def show_playlist_song(file_path, sheet_content):
+    """Show the sheet and name of the song the playlist switched to. Runs on the Tk thread."""
+    if piano_music_input_widget:
+        insert_text_in_chunks(piano_music_input_widget, sheet_content)
+    if status_label:
+        with playlist_lock:
+            remaining = len(playlist)
+        status_label.config(text=f"Now playing: {os.path.basename(file_path)} ({remaining} left in playlist)")
 
 def browse_for_midi():
-    """Open a file dialog to select multiple MIDI files and import them to the app's midi directory."""
+    """Open a file dialog to select MIDI files and import them in the background, or cancel a running import."""
+    global import_job
+    if import_job and import_job.is_running():
+        import_job.cancel()
+        if status_label:
+            status_label.config(text="Cancelling import...")
+        return
+
+    pack_patterns = " ".join("*" + suffix for suffix in MIDI_ARCHIVE_SUFFIXES)
     file_paths = filedialog.askopenfilenames(
-        title="Select MIDI Files to Import",
-        filetypes=(("MIDI files", "*.mid"), ("All files", "*.*"))
+        title="Select MIDI Files or Packs to Import",
+        filetypes=(("MIDI files and packs", "*.mid *.midi " + pack_patterns),
+                   ("MIDI files", "*.mid *.midi"),
+                   ("MIDI packs", pack_patterns),
+                   ("All files", "*.*"))
     )
     
     if not file_paths:
         return
         
-    import_count = 0
-    for file_path in file_paths:
-        import_count += import_midi_file(file_path)
-    
+    import_job = MidiImportJob(file_paths, get_midi_library(), get_search_index()).start()
+    if browse_midi_button:
+        browse_midi_button.config(text="Cancel Import")
+    poll_import_progress()
+
+def poll_import_progress():
+    """Show import progress on the Tk thread until the running import finishes."""
+    if not import_job:
+        return
+    if import_job.finished:
+        if status_label:
+            status_label.config(text=import_job.summary())
+        for error in import_job.errors:
+            print(f"[Debug] Import error: {error}")
+        if browse_midi_button:
+            browse_midi_button.config(text="Import Files...")
+        search_midi_files()
+        return
     if status_label:
-        status_label.config(text=f"Imported {import_count} MIDI file(s)")
-    refresh_midi_list()
+        status_label.config(text=f"Importing {import_job.done}/{import_job.total} "
+                                 f"({import_job.duplicates} duplicate(s))... press Cancel Import to stop")
+    if root:
+        root.after(IMPORT_POLL_MS, poll_import_progress)
 
 def import_midi_file(file_path):
     """Import a single MIDI file to the app's midi directory."""
-    try:
-        midi_dir = get_midi_directory()
-        dest_file = os.path.join(midi_dir, os.path.basename(file_path))
-        if not os.path.exists(dest_file):
-            shutil.copy2(file_path, dest_file)
-            return 1
-    except Exception as e:
-        if status_label:
-            status_label.config(text=f"Error importing file: {str(e)}")
-    return 0
+    job = MidiImportJob([file_path], get_midi_library(), get_search_index(), workers=1)
+    job.run()
+    if job.errors and status_label:
+        status_label.config(text=f"Error importing file: {job.errors[0]}")
+    return job.imported
 
 def load_selected_midi():
-    """Load the selected MIDI file from the listbox."""
+    """Load the selected MIDI file from the listbox, or cancel the load in progress."""
     global midi_listbox, status_label, current_midi_files
+    if load_job and not load_job.finished:
+        load_job.cancel()
+        return
+
     if not midi_listbox:
         return
         
@@ -1332,9 +3103,8 @@ def load_selected_midi():
             status_label.config(text="Please select a MIDI file from the list")
         return
         
-    if 'current_midi_files' not in globals() or not current_midi_files:
-        midi_folder = get_midi_directory()
-        current_midi_files = [f for f in os.listdir(midi_folder) if f.lower().endswith('.mid')]
+    if selection[0] >= len(current_midi_files):
+        return
     
     selected_file = current_midi_files[selection[0]]
     
@@ -1342,6 +3112,72 @@ def load_selected_midi():
     file_path = os.path.join(midi_folder, selected_file)
     load_midi_file(file_path)
 
+def get_track_info(file_name):
+    """Return per-track names, note counts and channel counts for a library file."""
+    tracks = get_search_index().track_info(file_name)
+    if tracks:
+        return tracks
+    try:
+        with open(os.path.join(get_midi_directory(), file_name), "rb") as f:
+            return read_midi_metadata(f.read())["tracks"]
+    except OSError as e:
+        print(f"[Debug] Could not read tracks of {file_name}: {e}")
+        return []
+
+def describe_track(index, track):
+    """Return the label shown for a track in the track chooser."""
+    name = track["name"] or f"Track {index + 1}"
+    label = f"{index + 1}. {name} ({track['notes']} notes)"
+    playable = sum(count for channel, count in enumerate(track["channels"]) if channel not in DEFAULT_EXCLUDED_CHANNELS)
+    if track["notes"] and not playable:
+        label += " - percussion, always skipped"
+    return label
+
+def choose_midi_tracks():
+    """Let the user pick which tracks of the selected MIDI file are played, then reload it."""
+    global midi_listbox, status_label, current_midi_files
+    if not midi_listbox:
+        return
+
+    selection = midi_listbox.curselection()
+    if not selection or selection[0] >= len(current_midi_files):
+        if status_label:
+            status_label.config(text="Please select a MIDI file to choose tracks")
+        return
+
+    selected_file = current_midi_files[selection[0]]
+    tracks = get_track_info(selected_file)
+    note_tracks = [(i, track) for i, track in enumerate(tracks) if track["notes"]]
+    if not note_tracks:
+        if status_label:
+            status_label.config(text=f"No note tracks found in: {selected_file}")
+        return
+
+    excluded = track_filters.get(selected_file, set())
+    dialog = tk.Toplevel(root)
+    dialog.title(f"Tracks - {selected_file}")
+    dialog.transient(root)
+    dialog.wm_attributes("-topmost", 1)
+
+    frame = ttk.Frame(dialog, padding=10)
+    frame.pack(fill=tk.BOTH, expand=True)
+    ttk.Label(frame, text="Play these tracks:").pack(anchor="w", pady=(0, 5))
+
+    choices = {}
+    for i, track in note_tracks:
+        choices[i] = tk.BooleanVar(value=i not in excluded)
+        ttk.Checkbutton(frame, text=describe_track(i, track), variable=choices[i]).pack(anchor="w")
+
+    def apply_choice():
+        track_filters[selected_file] = {i for i, var in choices.items() if not var.get()}
+        dialog.destroy()
+        load_midi_file(os.path.join(get_midi_directory(), selected_file))
+
+    button_frame = ttk.Frame(frame, padding=(0, 10, 0, 0))
+    button_frame.pack(fill=tk.X)
+    ttk.Button(button_frame, text="Load", command=apply_choice, width=12).pack(side=tk.LEFT, padx=(0, 5))
+    ttk.Button(button_frame, text="Cancel", command=dialog.destroy, width=12).pack(side=tk.LEFT)
+
 def delete_selected_midi():
     """Delete the selected MIDI file from the app's midi directory."""
     global midi_listbox, status_label, current_midi_files
@@ -1354,9 +3190,8 @@ def delete_selected_midi():
             status_label.config(text="Please select a MIDI file to delete")
         return
     
-    if 'current_midi_files' not in globals() or not current_midi_files:
-        midi_folder = get_midi_directory()
-        current_midi_files = [f for f in os.listdir(midi_folder) if f.lower().endswith('.mid')]
+    if selection[0] >= len(current_midi_files):
+        return
     
     selected_file = current_midi_files[selection[0]]
     
@@ -1366,81 +3201,1245 @@ def delete_selected_midi():
     if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete {selected_file}?"):
         try:
             os.remove(file_path)
-            refresh_midi_list(search_term=search_var.get(), sort_by=sort_var.get())
+            notify_midi_file_removed(selected_file)
+            search_midi_files()
             if status_label:
                 status_label.config(text=f"Deleted: {selected_file}")
         except Exception as e:
             if status_label:
                 status_label.config(text=f"Error deleting file: {str(e)}")
 
-def refresh_midi_list(search_term="", sort_by="name"):
-    """Refresh the list of available MIDI files."""
-    global midi_listbox, midi_count_label, current_midi_files
+# --- MIDI Library Model ---
+class MidiLibrary:
+    """In-memory model of the MIDI directory.
+
+    The directory is read once with os.scandir, which caches the stat results,
+    and then kept up to date with add() and remove() instead of re-listing it.
+    The directory watcher calls these from its own thread, so every access
+    goes through the lock, and version is bumped on each change so that the
+    UI can tell when to redraw.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.entries = {}
+        self.version = 0
+        self.lock = threading.RLock()
+        self._sorted = {}
+        self._last_query = None
+
+    def scan(self):
+        """Rebuild the model from the directory contents."""
+        entries = {}
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.lower().endswith('.mid') and entry.is_file():
+                    st = entry.stat()
+                    entries[entry.name] = (st.st_mtime, st.st_size, entry.name.lower())
+        with self.lock:
+            self.entries = entries
+            self._invalidate()
+
+    def add(self, name):
+        """Add or update a single file in the model. Returns True if anything changed."""
+        try:
+            st = os.stat(os.path.join(self.directory, name))
+        except OSError:
+            return self.remove(name)
+        entry = (st.st_mtime, st.st_size, name.lower())
+        with self.lock:
+            if self.entries.get(name) == entry:
+                return False
+            self.entries[name] = entry
+            self._invalidate()
+        return True
+
+    def remove(self, name):
+        """Remove a single file from the model. Returns True if it was present."""
+        with self.lock:
+            if self.entries.pop(name, None) is None:
+                return False
+            self._invalidate()
+        return True
+
+    def snapshot(self):
+        """Return a copy of the entries that is safe to use from another thread."""
+        with self.lock:
+            return dict(self.entries)
+
+    def _invalidate(self):
+        self.version += 1
+        self._sorted = {}
+        self._last_query = None
+
+    def sorted_names(self, sort_by="name"):
+        """Return all file names in display order, cached per sort key."""
+        with self.lock:
+            if sort_by not in self._sorted:
+                if sort_by == "date":
+                    names = sorted(self.entries, key=lambda n: self.entries[n][0], reverse=True)
+                else:
+                    names = sorted(self.entries)
+                self._sorted[sort_by] = names
+            return self._sorted[sort_by]
+
+    def filter(self, search_term="", sort_by="name"):
+        """Return the names matching search_term, in display order.
+
+        When the new term extends the previous one, only the previous
+        result is filtered again instead of the whole library.
+        """
+        term = search_term.lower()
+        with self.lock:
+            last = self._last_query
+            if last and last[1] == sort_by and last[0] in term:
+                candidates = last[2]
+            else:
+                candidates = self.sorted_names(sort_by)
+            if term:
+                entries = self.entries
+                result = [n for n in candidates if term in entries[n][2]]
+            else:
+                result = list(candidates)
+            self._last_query = (term, sort_by, result)
+        return result
+
+def get_midi_library():
+    """Get the shared MIDI library model, scanning the MIDI directory on first use."""
+    global midi_library
+    if midi_library is None:
+        midi_library = MidiLibrary(get_midi_directory())
+        midi_library.scan()
+    return midi_library
+
+# --- MIDI Search Index ---
+def read_midi_metadata(data):
+    """Collect text meta events and per-track note counts from raw MIDI bytes.
+
+    This walks the track chunks without building notes, so it is much cheaper
+    than a full MidiFile parse. Truncated tracks are read as far as possible.
+    """
+    texts = []
+    tracks = []
+    pos = 0
+    end = len(data)
+    while pos + 8 <= end:
+        chunk_id = bytes(data[pos:pos + 4])
+        length = int.from_bytes(data[pos + 4:pos + 8], "big")
+        pos += 8
+        if chunk_id == b"MTrk":
+            tracks.append(scan_track_metadata(data, pos, min(pos + length, end), texts))
+        pos += length
+    return {"texts": texts, "tracks": tracks}
+
+def scan_track_metadata(data, pos, end, texts):
+    """Scan one MTrk chunk, appending (type, text) pairs to texts."""
+    track = {"name": "", "notes": 0, "channels": [0] * 16}
+    running_status = 0
+    try:
+        while pos < end:
+            while data[pos] & 0x80:
+                pos += 1
+            pos += 1
+
+            status = data[pos]
+            if status == 0xFF:
+                meta_type = data[pos + 1]
+                pos += 2
+                length = 0
+                while data[pos] & 0x80:
+                    length = (length << 7) + (data[pos] & 0x7F)
+                    pos += 1
+                length = (length << 7) + data[pos]
+                pos += 1
+                if meta_type in TEXT_EVENT_TYPES:
+                    text = bytes(data[pos:pos + length]).decode("latin-1")
+                    texts.append((meta_type, text))
+                    if meta_type == 0x03 and not track["name"]:
+                        track["name"] = text
+                elif meta_type == 0x2F:
+                    break
+                pos += length
+            elif status in (0xF0, 0xF7):
+                pos += 1
+                length = 0
+                while data[pos] & 0x80:
+                    length = (length << 7) + (data[pos] & 0x7F)
+                    pos += 1
+                length = (length << 7) + data[pos]
+                pos += 1 + length
+            else:
+                if status & 0x80:
+                    running_status = status
+                    pos += 1
+                kind = running_status >> 4
+                if kind == 0x9 and data[pos + 1] > 0:
+                    track["notes"] += 1
+                    track["channels"][running_status & 0x0F] += 1
+                pos += 1 if kind in (0xC, 0xD) else 2
+    except IndexError:
+        pass
+    return track
+
+def normalize_search_text(text):
+    """Lowercase text and collapse everything but letters and digits to single spaces."""
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", text.lower()).split())
+
+def search_trigrams(text):
+    """Return the set of character trigrams of a normalized search string."""
+    text = " " + text + " "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class MidiSearchIndex:
+    """Persistent trigram index over MIDI file names and embedded text events.
+
+    Only the per-file documents are stored on disk; the posting lists are
+    rebuilt on load. Files are added and removed one at a time, so keeping
+    the index current never needs a full rebuild.
+
+    Each file gets a small integer id. Posting lists are sets of ids, turned
+    into int bitmasks on first use so that queries score every file with a
+    handful of big-integer operations instead of a Python loop per file.
+    """
+
+    VERSION = 2
+    MAX_TEXT_LENGTH = 512
+    LOAD_BATCH = 250
+    NAME = 0
+    TEXT = 1
+
+    def __init__(self, index_file=None):
+        self.index_file = index_file
+        self.docs = {}
+        self.keys = {}
+        self.hashes = {}
+        self.ids = {}
+        self.names = []
+        self.free_ids = []
+        self.postings = ({}, {})
+        self.bitmasks = {}
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+        self.save_lock = threading.Lock()
+        self.loaded = False
+        self.dirty = False
+        self.version = 0
+        self._save_timer = None
+
+    def load(self):
+        """Load documents from the index file once, ignoring missing or stale files.
+
+        Runs on a worker thread. Documents go in LOAD_BATCH at a time so
+        queries are never held up for the whole load, and files indexed by
+        other threads in the meantime keep their newer documents. Callers
+        that arrive while a load is running wait for it to finish.
+        """
+        with self.load_lock:
+            if self.loaded:
+                return
+            self.loaded = True
+            if not self.index_file or not os.path.exists(self.index_file):
+                return
+            try:
+                with open(self.index_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") != self.VERSION:
+                    return
+                docs = list(data["docs"].items())
+                for start in range(0, len(docs), self.LOAD_BATCH):
+                    with self.lock:
+                        dirty = self.dirty
+                        for name, doc in docs[start:start + self.LOAD_BATCH]:
+                            if name not in self.docs:
+                                self._insert(name, doc)
+                        self.dirty = dirty
+            except Exception as e:
+                print(f"[Debug] Could not load search index: {e}")
+
+    def save_later(self, delay=2.0):
+        """Save after delay seconds, so that bursts of changes are written once."""
+        with self.lock:
+            if self._save_timer:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(delay, self.save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def save(self):
+        """Write the documents to the index file if anything changed.
+
+        Saves run one at a time, each through its own temporary file, so the
+        index file is always a complete snapshot and never an older one.
+        """
+        if not self.index_file:
+            return
+        with self.save_lock:
+            with self.lock:
+                if not self.dirty:
+                    return
+                data = {"version": self.VERSION, "docs": dict(self.docs)}
+                self.dirty = False
+            tmp_file = None
+            try:
+                with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(self.index_file),
+                                                 prefix="search_index.", suffix=".tmp", delete=False) as f:
+                    tmp_file = f.name
+                    json.dump(data, f)
+                os.replace(tmp_file, self.index_file)
+            except BaseException:
+                with self.lock:
+                    self.dirty = True
+                if tmp_file and os.path.exists(tmp_file):
+                    os.remove(tmp_file)
+                raise
+
+    @staticmethod
+    def build_doc(path, mtime, size, data=None):
+        """Build the index document of a MIDI file, reading it unless data is given."""
+        try:
+            if data is None:
+                with open(path, "rb") as f:
+                    data = f.read()
+            metadata = read_midi_metadata(data)
+            content_hash = hash_midi_bytes(data)
+        except OSError:
+            metadata = {"texts": [], "tracks": []}
+            content_hash = None
+        text = " | ".join(t for _, t in metadata["texts"] if t.strip())
+        return {
+            "mtime": mtime,
+            "size": size,
+            "hash": content_hash,
+            "text": text[:MidiSearchIndex.MAX_TEXT_LENGTH],
+            "tracks": metadata["tracks"],
+        }
+
+    def add_document(self, name, doc):
+        """Index a file whose document was built by the caller."""
+        with self.lock:
+            self._insert(name, doc)
+
+    def find_hash(self, content_hash):
+        """Return the name of an indexed file with this content hash, or None."""
+        with self.lock:
+            return self.hashes.get(content_hash)
+
+    def _insert(self, name, doc):
+        self._delete(name)
+        if self.free_ids:
+            doc_id = self.free_ids.pop()
+            self.names[doc_id] = name
+        else:
+            doc_id = len(self.names)
+            self.names.append(name)
+        keys = (normalize_search_text(os.path.splitext(name)[0]), normalize_search_text(doc["text"]))
+        self.docs[name] = doc
+        self.keys[name] = keys
+        self.ids[name] = doc_id
+        if doc.get("hash"):
+            self.hashes[doc["hash"]] = name
+        for kind, key in enumerate(keys):
+            postings = self.postings[kind]
+            for trigram in search_trigrams(key):
+                postings.setdefault(trigram, set()).add(doc_id)
+                mask = self.bitmasks.get((kind, trigram))
+                if mask is not None:
+                    self.bitmasks[(kind, trigram)] = mask | (1 << doc_id)
+        self.dirty = True
+        self.version += 1
+
+    def _delete(self, name):
+        doc = self.docs.pop(name, None)
+        if doc is None:
+            return
+        if self.hashes.get(doc.get("hash")) == name:
+            del self.hashes[doc["hash"]]
+        keys = self.keys.pop(name)
+        doc_id = self.ids.pop(name)
+        self.names[doc_id] = None
+        self.free_ids.append(doc_id)
+        for kind, key in enumerate(keys):
+            postings = self.postings[kind]
+            for trigram in search_trigrams(key):
+                posting = postings.get(trigram)
+                if posting is not None:
+                    posting.discard(doc_id)
+                    if not posting:
+                        del postings[trigram]
+                mask = self.bitmasks.get((kind, trigram))
+                if mask is not None:
+                    self.bitmasks[(kind, trigram)] = mask & ~(1 << doc_id)
+        self.dirty = True
+        self.version += 1
+
+    def _bitmask(self, kind, trigram):
+        """Return the posting list of a trigram as an int with one bit per file id."""
+        mask = self.bitmasks.get((kind, trigram))
+        if mask is None:
+            bits = bytearray((len(self.names) + 7) // 8)
+            for doc_id in self.postings[kind].get(trigram, ()):
+                bits[doc_id >> 3] |= 1 << (doc_id & 7)
+            mask = int.from_bytes(bits, "little")
+            self.bitmasks[(kind, trigram)] = mask
+        return mask
+
+    def add(self, directory, name):
+        """Index or re-index a single file, skipping it if it has not changed."""
+        path = os.path.join(directory, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.remove(name)
+            return
+        with self.lock:
+            doc = self.docs.get(name)
+            if doc and doc["mtime"] == st.st_mtime and doc["size"] == st.st_size:
+                return
+        doc = self.build_doc(path, st.st_mtime, st.st_size)
+        with self.lock:
+            self._insert(name, doc)
+
+    def remove(self, name):
+        """Drop a single file from the index."""
+        with self.lock:
+            self._delete(name)
+
+    def stale(self, entries):
+        """Return the names of {name: (mtime, size, ...)} library entries that are unindexed or out of date."""
+        with self.lock:
+            return [n for n, e in entries.items()
+                    if n not in self.docs or self.docs[n]["mtime"] != e[0] or self.docs[n]["size"] != e[1]]
+
+    def sync(self, directory, entries):
+        """Bring the index in line with {name: (mtime, size, ...)} library entries."""
+        self.load()
+        with self.lock:
+            stale = [n for n in self.docs if n not in entries]
+            for name in stale:
+                self._delete(name)
+        changed = self.stale(entries)
+        for name in changed:
+            entry = entries[name]
+            doc = self.build_doc(os.path.join(directory, name), entry[0], entry[1])
+            with self.lock:
+                self._insert(name, doc)
+        return len(stale) + len(changed)
+
+    def query(self, text, limit=500):
+        """Return up to limit file names ranked by fuzzy similarity to text.
+
+        Files score two points for each query trigram in their name and one
+        for each trigram in their metadata, plus a bonus for an exact substring
+        match. Per-file scores are kept as bit slices (slice i holds bit i of
+        every file's score), so adding a posting list is a short carry chain.
+        """
+        term = normalize_search_text(text)
+        if not term:
+            return []
+        with self.lock:
+            slices = []
+            for trigram in search_trigrams(term):
+                for kind, weight_bit in ((self.NAME, 1), (self.TEXT, 0)):
+                    carry = self._bitmask(kind, trigram)
+                    i = weight_bit
+                    while carry:
+                        while i >= len(slices):
+                            slices.append(0)
+                        slices[i], carry = slices[i] ^ carry, slices[i] & carry
+                        i += 1
+            if not slices:
+                return []
+
+            everything = (1 << len(self.names)) - 1
+            candidates = []
+            best = 0
+            for score in range((1 << len(slices)) - 1, 0, -1):
+                if best and (score * 2 < best or len(candidates) >= limit):
+                    break
+                mask = everything
+                for i, bits in enumerate(slices):
+                    mask &= bits if score >> i & 1 else everything ^ bits
+                    if not mask:
+                        break
+                if not mask:
+                    continue
+                best = best or score
+                ones = bin(mask)[:1:-1]
+                doc_id = ones.find("1")
+                while doc_id != -1:
+                    candidates.append((score, self.names[doc_id]))
+                    doc_id = ones.find("1", doc_id + 1)
+
+            ranked = []
+            for score, name in candidates:
+                name_key, text_key = self.keys[name]
+                if term in name_key:
+                    score += best
+                elif term in text_key:
+                    score += best / 2
+                ranked.append((score, -len(name), name))
+        return [name for _, _, name in heapq.nlargest(limit, ranked)]
+
+    def track_info(self, name):
+        """Return the per-track names and note counts recorded for a file."""
+        with self.lock:
+            doc = self.docs.get(name)
+            return list(doc["tracks"]) if doc else []
+
+def get_search_index():
+    """Get the shared search index of the app data directory.
+
+    The saved documents are loaded by the first sync, on a worker thread;
+    until then queries only see files indexed in this session.
+    """
+    global search_index
+    if search_index is None:
+        search_index = MidiSearchIndex(os.path.join(get_app_data_dir(), "search_index.json"))
+    return search_index
+
+def start_search_index_sync():
+    """Load the search index, then index new and changed library files, on a background thread."""
+    library = get_midi_library()
+    index = get_search_index()
+    entries = library.snapshot()
+
+    def worker():
+        try:
+            changed = index.sync(library.directory, entries)
+            index.save()
+            print(f"[Debug] Search index synced ({changed} file(s) updated)")
+        except Exception as e:
+            print(f"[Debug] Error syncing search index: {e}")
+
+    threading.Thread(target=worker, daemon=True).start()
+
+def notify_midi_file_added(name):
+    """Record a new or changed file in the library model and search index."""
+    library = get_midi_library()
+    library.add(name)
+    index = get_search_index()
+    index.add(library.directory, name)
+    index.save_later()
+
+def notify_midi_file_removed(name):
+    """Drop a file from the library model and search index."""
+    get_midi_library().remove(name)
+    index = get_search_index()
+    index.remove(name)
+    index.save_later()
+
+# --- MIDI Directory Watcher ---
+class MidiDirectoryWatcher:
+    """Reports .mid files added, removed or modified in a directory.
+
+    Uses inotify on Linux and falls back to polling the directory with
+    os.scandir elsewhere, or when inotify is unavailable. The callback
+    receives (event, name) on the watcher thread, where event is one of
+    "added", "removed", "modified", or "rescan" with name None when events
+    were lost and the caller should rebuild its state. Callers should treat
+    "added" and "modified" alike.
+
+    With inotify a created file is reported once: when it is closed after
+    writing, at once if it is a hardlink to a complete file, or after
+    CREATE_SETTLE seconds if it was created in place and never written
+    through a file descriptor.
+    """
+
+    CREATE_SETTLE = 1.0
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+
+    def __init__(self, directory, callback, poll_interval=2.0):
+        self.directory = directory
+        self.callback = callback
+        self.poll_interval = poll_interval
+        self.mode = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        fd = self._open_inotify() if sys.platform.startswith('linux') else None
+        if fd is not None:
+            self.mode = "inotify"
+            self._thread = threading.Thread(target=self._run_inotify, args=(fd,), daemon=True)
+        else:
+            self.mode = "polling"
+            self._thread = threading.Thread(target=self._run_polling, daemon=True)
+        self._thread.start()
+        print(f"[Debug] Watching {self.directory} ({self.mode})")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+
+    def _emit(self, event, name):
+        if name is not None and not name.lower().endswith('.mid'):
+            return
+        try:
+            self.callback(event, name)
+        except Exception as e:
+            print(f"[Debug] Error handling watcher event {event} {name}: {e}")
+
+    def _open_inotify(self):
+        try:
+            import ctypes
+            import ctypes.util
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                return None
+            mask = (self.IN_CLOSE_WRITE | self.IN_MOVED_FROM | self.IN_MOVED_TO |
+                    self.IN_CREATE | self.IN_DELETE | self.IN_DELETE_SELF)
+            if libc.inotify_add_watch(fd, os.fsencode(self.directory), mask) < 0:
+                os.close(fd)
+                return None
+            return fd
+        except (OSError, AttributeError) as e:
+            print(f"[Debug] inotify unavailable, polling instead: {e}")
+            return None
+
+    def _run_inotify(self, fd):
+        import select
+        import struct
+        header = struct.Struct("iIII")
+        created = {}  # name -> time by which it is reported if no IN_CLOSE_WRITE comes first
+        try:
+            while not self._stop.is_set():
+                ready, _, _ = select.select([fd], [], [], 0.5)
+                now = time.monotonic()
+                for name, deadline in list(created.items()):
+                    if deadline <= now:
+                        del created[name]
+                        self._emit("added", name)
+                if not ready:
+                    continue
+                try:
+                    data = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                pos = 0
+                while pos + header.size <= len(data):
+                    _, mask, _, length = header.unpack_from(data, pos)
+                    name = data[pos + header.size:pos + header.size + length].rstrip(b"\0")
+                    name = os.fsdecode(name) if name else None
+                    pos += header.size + length
+
+                    if mask & self.IN_Q_OVERFLOW:
+                        self._emit("rescan", None)
+                    elif mask & (self.IN_DELETE_SELF | self.IN_IGNORED):
+                        print("[Debug] Watched directory went away, switching to polling")
+                        self.mode = "polling"
+                        self._emit("rescan", None)
+                        return self._run_polling()
+                    elif name is None:
+                        continue
+                    elif mask & (self.IN_MOVED_FROM | self.IN_DELETE):
+                        created.pop(name, None)
+                        self._emit("removed", name)
+                    elif mask & self.IN_MOVED_TO:
+                        self._emit("added", name)
+                    elif mask & self.IN_CREATE:
+                        try:
+                            linked = os.stat(os.path.join(self.directory, name)).st_nlink > 1
+                        except OSError:
+                            continue
+                        if linked:
+                            self._emit("added", name)
+                        else:
+                            created[name] = now + self.CREATE_SETTLE
+                    elif mask & self.IN_CLOSE_WRITE:
+                        self._emit("added" if created.pop(name, None) else "modified", name)
+        finally:
+            os.close(fd)
+
+    def _snapshot(self):
+        files = {}
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.lower().endswith('.mid') and entry.is_file():
+                        st = entry.stat()
+                        files[entry.name] = (st.st_mtime, st.st_size)
+        except OSError:
+            pass
+        return files
+
+    def _run_polling(self):
+        previous = self._snapshot()
+        while not self._stop.wait(self.poll_interval):
+            current = self._snapshot()
+            for name in previous.keys() - current.keys():
+                self._emit("removed", name)
+            for name, signature in current.items():
+                if name not in previous:
+                    self._emit("added", name)
+                elif previous[name] != signature:
+                    self._emit("modified", name)
+            previous = current
+
+def handle_midi_directory_event(event, name):
+    """Apply a watcher event to the library model and search index."""
+    library = get_midi_library()
+    index = get_search_index()
+    if event == "rescan":
+        library.scan()
+        index.sync(library.directory, library.snapshot())
+    elif event == "removed":
+        library.remove(name)
+        index.remove(name)
+    else:
+        library.add(name)
+        index.add(library.directory, name)
+    index.save_later()
+
+def start_midi_directory_watcher():
+    """Start watching the MIDI directory for changes made outside the app."""
+    global midi_watcher
+    if midi_watcher is None:
+        midi_watcher = MidiDirectoryWatcher(get_midi_directory(), handle_midi_directory_event)
+        midi_watcher.start()
+    return midi_watcher
+
+def poll_library_changes():
+    """Redraw the MIDI list on the Tk thread when the library or index changed."""
+    if midi_listbox and (get_midi_library().version, get_search_index().version) != displayed_library_version:
+        search_midi_files()
+    if root:
+        root.after(LIBRARY_POLL_MS, poll_library_changes)
+
+# --- Bulk Import ---
+def hash_midi_bytes(data):
+    """Return the content hash used to spot duplicate MIDI files."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def link_or_copy(src, dest):
+    """Place src at dest as cheaply as the filesystem allows.
+
+    Tries a copy-on-write reflink first, then a hardlink, then a regular
+    copy. Returns the method that worked. Never replaces an existing dest:
+    FileExistsError is raised instead, e.g. when another instance imported
+    a file of the same name first.
+    """
+    if sys.platform.startswith('linux'):
+        created = False
+        try:
+            import fcntl
+            FICLONE = 0x40049409
+            with open(src, "rb") as s:
+                with open(dest, "xb") as d:
+                    created = True
+                    fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+            shutil.copystat(src, dest)
+            return "reflink"
+        except FileExistsError:
+            raise
+        except (OSError, ImportError):
+            if created:
+                os.remove(dest)
+    try:
+        os.link(src, dest)
+        return "hardlink"
+    except FileExistsError:
+        raise
+    except (OSError, AttributeError):
+        pass
+    with open(src, "rb") as s, open(dest, "xb") as d:
+        shutil.copyfileobj(s, d)
+    shutil.copystat(src, dest)
+    return "copy"
+
+def is_midi_archive(path):
+    """Return True if path names a zip or tar archive that may hold MIDI files."""
+    return path.lower().endswith(MIDI_ARCHIVE_SUFFIXES)
+
+def iter_archive_midi(path):
+    """Yield (member_name, data) for the MIDI members of a zip or tar archive, one at a time.
+
+    Tar archives are read as a stream, so compressed tarballs are never
+    decompressed to disk. data is None for members over MAX_ARCHIVE_MEMBER_BYTES.
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for member in archive.infolist():
+                if member.is_dir() or not member.filename.lower().endswith((".mid", ".midi")):
+                    continue
+                if member.file_size > MAX_ARCHIVE_MEMBER_BYTES:
+                    yield member.filename, None
+                    continue
+                yield member.filename, archive.read(member)
+        return
+
+    with tarfile.open(path, "r|*") as archive:
+        for member in archive:
+            if not member.isfile() or not member.name.lower().endswith((".mid", ".midi")):
+                continue
+            if member.size > MAX_ARCHIVE_MEMBER_BYTES:
+                yield member.name, None
+                continue
+            yield member.name, archive.extractfile(member).read()
+
+class MidiImportJob:
+    """Imports many MIDI files into the library on a thread pool.
+
+    Files are deduplicated by content hash against the library and each
+    other, placed with link_or_copy, and indexed from the bytes already read
+    for hashing. Zip and tar archives are expanded member by member while the
+    workers import the members already read, with a bounded number in flight,
+    so an archive is never extracted to disk or held in memory as a whole.
+    Progress is read from the counters by the UI; cancel() stops files that
+    have not started yet.
+    """
+
+    def __init__(self, paths, library, index, workers=None):
+        self.paths = list(paths)
+        self.library = library
+        self.index = index
+        self.workers = workers or min(8, (os.cpu_count() or 1) + 4)
+        self.total = len(self.paths)
+        self.done = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.errors = []
+        self.finished = False
+        self.lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._claimed_hashes = set()
+        self._claimed_names = set()
+        self._unindexed = {}
+        self._stale = set()
+        self._thread = None
+
+    def start(self):
+        """Run the import on a background thread."""
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def is_running(self):
+        return self._thread is not None and not self.finished
+
+    def run(self):
+        """Import every file, blocking until all workers are done."""
+        from concurrent.futures import ThreadPoolExecutor
+        try:
+            # Library files the saved index does not cover are only hashed when a file of the same size arrives.
+            self.index.load()
+            entries = self.library.snapshot()
+            self._stale = set(self.index.stale(entries))
+            for name in self._stale:
+                self._unindexed.setdefault(entries[name][1], []).append(name)
+            slots = threading.BoundedSemaphore(self.workers * 2)
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                def submit(func, *args):
+                    slots.acquire()
+                    pool.submit(func, *args).add_done_callback(lambda _: slots.release())
+
+                for path in self.paths:
+                    if self.cancelled:
+                        break
+                    if is_midi_archive(path):
+                        self._expand_archive(path, submit)
+                    else:
+                        submit(self._import_one, path)
+            self.index.save_later()
+        finally:
+            self.finished = True
+
+    def _expand_archive(self, path, submit):
+        """Hand the MIDI members of an archive to the workers as they are read."""
+        archive_name = os.path.basename(path)
+        with self.lock:
+            self.total -= 1
+        try:
+            for member_name, data in iter_archive_midi(path):
+                if self.cancelled:
+                    break
+                with self.lock:
+                    self.total += 1
+                submit(self._import_member, f"{archive_name}:{member_name}", os.path.basename(member_name), data)
+        except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError) as e:
+            self.errors.append(f"{archive_name}: {e}")
+            with self.lock:
+                self.total += 1
+                self.done += 1
+                self.failed += 1
+
+    def _import_one(self, path):
+        def read():
+            with open(path, "rb") as f:
+                return f.read()
+        self._import(os.path.basename(path), os.path.basename(path), read, lambda dest: link_or_copy(path, dest))
+
+    def _import_member(self, label, name, data):
+        def read():
+            if data is None:
+                raise ValueError(f"larger than {MAX_ARCHIVE_MEMBER_BYTES // (1024 * 1024)} MB")
+            return data
+
+        def place(dest):
+            with open(dest, "xb") as f:
+                f.write(data)
+        self._import(label, name, read, place)
+
+    def _import(self, label, name, read, place):
+        """Hash, deduplicate, place and index one file; place(dest) puts its bytes in the library."""
+        if self.cancelled:
+            return
+        result = "failed"
+        try:
+            data = read()
+            content_hash = hash_midi_bytes(data)
+            with self.lock:
+                if content_hash in self._claimed_hashes or self._find_in_library(content_hash, len(data)):
+                    result = "duplicate"
+                else:
+                    self._claimed_hashes.add(content_hash)
+                    name = self._claim_name(name)
+            if result != "duplicate":
+                dest = os.path.join(self.library.directory, name)
+                try:
+                    place(dest)
+                except BaseException:
+                    # Nothing was placed, so a later copy of the same content may still be imported.
+                    with self.lock:
+                        self._claimed_hashes.discard(content_hash)
+                        self._claimed_names.discard(name)
+                    raise
+                st = os.stat(dest)
+                doc = MidiSearchIndex.build_doc(dest, st.st_mtime, st.st_size, data)
+                self.index.add_document(name, doc)
+                self.library.add(name)
+                result = "imported"
+        except Exception as e:
+            self.errors.append(f"{label}: {e}")
+        with self.lock:
+            self.done += 1
+            if result == "imported":
+                self.imported += 1
+            elif result == "duplicate":
+                self.duplicates += 1
+            else:
+                self.failed += 1
+
+    def _find_in_library(self, content_hash, size):
+        """Return a library file with this content, hashing files the index does not cover only when needed.
+
+        Unindexed files of the same size are indexed first, and a match on a
+        file whose index entry was out of date is checked again. Runs with
+        lock held, so workers never hash a file twice or miss a copy that is
+        being indexed.
+        """
+        for name in self._unindexed.pop(size, ()):
+            self._stale.discard(name)
+            self.index.add(self.library.directory, name)
+        found = self.index.find_hash(content_hash)
+        while found in self._stale:
+            self._stale.discard(found)
+            self.index.add(self.library.directory, found)
+            found = self.index.find_hash(content_hash)
+        return found
+
+    def _claim_name(self, name):
+        """Pick a free file name in the library, adding a counter if needed."""
+        stem, ext = os.path.splitext(name)
+        if ext.lower() == ".midi":
+            ext = ".mid"
+        if ext.lower() != ".mid":
+            stem, ext = name, ".mid"
+        candidate = stem + ext
+        counter = 1
+        while candidate in self._claimed_names or os.path.exists(os.path.join(self.library.directory, candidate)):
+            candidate = f"{stem} ({counter}){ext}"
+            counter += 1
+        self._claimed_names.add(candidate)
+        return candidate
+
+    def summary(self):
+        text = f"Imported {self.imported} MIDI file(s)"
+        if self.duplicates:
+            text += f", skipped {self.duplicates} duplicate(s)"
+        if self.failed:
+            text += f", {self.failed} failed"
+        if self.cancelled and self.done < self.total:
+            text += f" (cancelled, {self.total - self.done} not processed)"
+        return text
+
+class VirtualListbox:
+    """A Listbox that only holds the rows currently in view.
+
+    Items live in a Python list; scrolling re-renders the visible window, so
+    the cost of showing the list does not grow with the library size.
+    """
+
+    def __init__(self, parent, scrollbar, **options):
+        self.items = []
+        self.offset = 0
+        self.selected = None
+        self.listbox = tk.Listbox(parent, exportselection=False, **options)
+        self.scrollbar = scrollbar
+        self.scrollbar.config(command=self.yview)
+        self.listbox.bind("<Configure>", self.render)
+        self.listbox.bind("<<ListboxSelect>>", self._on_select)
+        self.listbox.bind("<MouseWheel>", lambda e: self._scroll(int(-1 * (e.delta / 120))))
+        self.listbox.bind("<Button-4>", lambda e: self._scroll(-1))
+        self.listbox.bind("<Button-5>", lambda e: self._scroll(1))
+        self.listbox.bind("<Up>", lambda e: self._move_selection(-1))
+        self.listbox.bind("<Down>", lambda e: self._move_selection(1))
+
+    def pack(self, **kwargs):
+        self.listbox.pack(**kwargs)
+
+    def bind(self, sequence, func):
+        self.listbox.bind(sequence, func, add="+")
+
+    def set_items(self, items):
+        """Replace the displayed items, keeping the selected item selected if it is still listed."""
+        previous = self.items[self.selected] if self.curselection() else None
+        self.items = items
+        self.selected = None
+        if previous is not None:
+            try:
+                self.selected = items.index(previous)
+            except ValueError:
+                pass
+        self.render()
+
+    def curselection(self):
+        """Return the selected index into items, like Listbox.curselection()."""
+        if self.selected is None or self.selected >= len(self.items):
+            return ()
+        return (self.selected,)
+
+    def visible_rows(self):
+        height = self.listbox.winfo_height()
+        if height <= 1:
+            return int(self.listbox.cget("height"))
+        line = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace") + 1
+        return max(1, height // line + 1)
+
+    def render(self, event=None):
+        rows = self.visible_rows()
+        self.offset = max(0, min(self.offset, len(self.items) - rows))
+        self.listbox.delete(0, tk.END)
+        window = self.items[self.offset:self.offset + rows]
+        if window:
+            self.listbox.insert(tk.END, *window)
+        if self.selected is not None and self.offset <= self.selected < self.offset + rows:
+            self.listbox.selection_set(self.selected - self.offset)
+        if self.items:
+            self.scrollbar.set(self.offset / len(self.items), min(1.0, (self.offset + rows) / len(self.items)))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def yview(self, *args):
+        """Scrollbar command handler for the moveto and scroll protocols."""
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * len(self.items))
+            self.render()
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if args[2] == "pages":
+                step *= self.visible_rows()
+            self._scroll(step)
+
+    def _scroll(self, step):
+        self.offset += step
+        self.render()
+        return "break"
+
+    def _on_select(self, event=None):
+        selection = self.listbox.curselection()
+        if selection:
+            self.selected = self.offset + selection[0]
+
+    def _move_selection(self, step):
+        if not self.items:
+            return "break"
+        if self.selected is None:
+            self.selected = self.offset
+        else:
+            self.selected = max(0, min(len(self.items) - 1, self.selected + step))
+        rows = self.visible_rows()
+        if self.selected < self.offset:
+            self.offset = self.selected
+        elif self.selected >= self.offset + rows - 1:
+            self.offset = self.selected - rows + 2
+        self.render()
+        self.listbox.event_generate("<<ListboxSelect>>")
+        return "break"
+
+def refresh_midi_list(search_term="", sort_by="name", rescan=False):
+    """Refresh the list of available MIDI files from the library model."""
+    global midi_listbox, midi_count_label, current_midi_files, displayed_library_version
     if not midi_listbox:
         return
-        
-    midi_listbox.delete(0, tk.END)
-    
-    midi_folder = get_midi_directory()
-    midi_files = [f for f in os.listdir(midi_folder) if f.lower().endswith('.mid')]
-    
-    if search_term:
-        midi_files = [f for f in midi_files if search_term.lower() in f.lower()]
-    
-    if sort_by == "name":
-        midi_files.sort()
-    elif sort_by == "date":
-        midi_files.sort(key=lambda f: os.path.getmtime(os.path.join(midi_folder, f)), reverse=True)
     
-    current_midi_files = midi_files.copy()
+    library = get_midi_library()
+    if rescan:
+        library.scan()
+    displayed_library_version = (library.version, get_search_index().version)
     
-    for file in midi_files:
-        midi_listbox.insert(tk.END, file)
+    current_midi_files = library.filter(search_term, sort_by)
+    if len(search_term.strip()) >= 3:
+        ranked = [n for n in get_search_index().query(search_term) if n in library.entries]
+        ranked_set = set(ranked)
+        current_midi_files = ranked + [n for n in current_midi_files if n not in ranked_set]
+    midi_listbox.set_items(current_midi_files)
         
     if 'midi_count_label' in globals() and midi_count_label:
-        midi_count_label.config(text=f"MIDI Library ({len(midi_files)} files)")
+        midi_count_label.config(text=f"MIDI Library ({len(current_midi_files)} files)")
+
+def schedule_midi_search(event=None):
+    """Debounce search box typing so the list is only filtered once the user pauses."""
+    global search_after_id
+    if not root:
+        search_midi_files()
+        return
+    if search_after_id:
+        root.after_cancel(search_after_id)
+    search_after_id = root.after(SEARCH_DEBOUNCE_MS, search_midi_files)
 
 def search_midi_files(event=None):
     """Search MIDI files based on the search box content."""
+    global search_after_id
+    search_after_id = None
+    if not midi_listbox:
+        return
     search_term = search_var.get()
     refresh_midi_list(search_term=search_term, sort_by=sort_var.get())
 
+# --- Song Analytics ---
+def press_columns(notes):
+    """Return (onsets, key counts, shifted counts) of the key presses in a compiled timeline.
+
+    Onsets are in seconds at 1x speed; the final placeholder delay is not part of the song.
+    """
+    onsets, keys, shifted = [], [], []
+    elapsed = 0.0
+    for delay, chord in notes:
+        if "~" not in chord and "tempo" not in chord and chord:
+            onsets.append(elapsed)
+            keys.append(len(chord))
+            shifted.append(sum(1 for key in chord if is_shifted(key)))
+        elapsed += floor_to_zero(delay)
+    duration = elapsed - floor_to_zero(notes[-1][0]) if notes else 0.0
+    return onsets, keys, shifted, duration
+
+def analyze_song(notes, window=1.0):
+    """Summarize a compiled timeline: true duration, note density, chord sizes, keystroke peaks and shifted share."""
+    onsets, keys, shifted, duration = press_columns(notes)
+    total_keys = sum(keys)
+    result = {"duration": duration, "note_count": total_keys, "max_chord": max(keys, default=0),
+              "shifted_share": sum(shifted) / total_keys if total_keys else 0.0,
+              "density": [], "peak_keys_per_second": 0}
+    if not onsets:
+        return result
+
+    seconds = int(duration // window) + 1
+    if np is not None:
+        onset_array = np.asarray(onsets)
+        key_array = np.asarray(keys)
+        result["density"] = np.bincount((onset_array // window).astype(np.int64), weights=key_array,
+                                        minlength=seconds).astype(np.int64).tolist()
+        cumulative = np.concatenate(([0], np.cumsum(key_array)))
+        window_end = np.searchsorted(onset_array, onset_array + window, side="left")
+        result["peak_keys_per_second"] = int((cumulative[window_end] - cumulative[:-1]).max() / window)
+    else:
+        import bisect
+        density = [0] * seconds
+        for onset, count in zip(onsets, keys):
+            density[int(onset // window)] += count
+        result["density"] = density
+        cumulative = [0] + list(itertools.accumulate(keys))
+        peak = 0
+        for i, onset in enumerate(onsets):
+            end = bisect.bisect_left(onsets, onset + window, i)
+            peak = max(peak, cumulative[end] - cumulative[i])
+        result["peak_keys_per_second"] = int(peak / window)
+    return result
+
+def format_duration_ms(seconds):
+    """Format seconds as m:ss.mmm."""
+    millis = int(round(seconds * 1000))
+    return f"{millis // 60000}:{millis // 1000 % 60:02d}.{millis % 1000:03d}"
+
+def cached_midi_info(file_path):
+    """Return the cached get_midi_info result for the current version of a file, or None."""
+    try:
+        key = SongStore.key_for(file_path)
+    except OSError:
+        return None
+    with analytics_lock:
+        cached = analytics_cache.get(key)
+        if cached is not None:
+            analytics_cache.move_to_end(key)
+        return cached
+
 def get_midi_info(file_path):
-    """Get basic information about a MIDI file."""
+    """Get basic information and timeline analytics for a MIDI file, cached per file version.
+
+    The most recent ANALYTICS_CACHE_ENTRIES results are kept. A miss parses
+    the file, so the GUI calls this from a worker thread.
+    """
     try:
-        midi = MidiFile(file_path, verbose=False)
-        if not midi.success:
-            return {"status": "error", "message": "Failed to parse MIDI file"}
-            
-        note_count = 0
-        for timing, notes in midi.notes:
-            if not "tempo" in notes and "~" not in notes:
-                note_count += len(notes)
-                
-        if len(midi.notes) > 1:
-            last_time = float(midi.notes[-1][0])
-            duration_secs = last_time
-            mins = int(duration_secs // 60)
-            secs = int(duration_secs % 60)
-            duration = f"{mins}:{secs:02d}"
+        key = SongStore.key_for(file_path)
+        with analytics_lock:
+            cached = analytics_cache.get(key)
+            if cached is not None:
+                analytics_cache.move_to_end(key)
+                return cached
+
+        start = time.perf_counter()
+        song = get_song_store().get(key)
+        if song is not None:
+            info = song["info"]
+            source_notes = song["notes"]
         else:
-            duration = "Unknown"
-            
-        tempo = "Unknown"
-        for timing, notes in midi.notes:
-            if "tempo" in notes:
-                try:
-                    tempo = notes.split("=")[1]
-                    break
-                except:
-                    pass
-                    
-        return {
+            midi = MidiFile(file_path, verbose=False,
+                            exclude_tracks=track_filters.get(os.path.basename(file_path), ()))
+            if not midi.success:
+                return {"status": "error", "message": "Failed to parse MIDI file"}
+            source_notes = midi.notes
+            info = compile_song(midi.notes)
+            if info is None:
+                return {"status": "error", "message": "Failed to process MIDI file"}
+            info[2] = parse_midi_info(info)
+
+        tempo = next((notes.split("=")[1] for timing, notes in source_notes if "tempo" in notes), "Unknown")
+        stats = analyze_song(info[2])
+        result = {
             "status": "success",
-            "note_count": note_count,
-            "duration": duration,
-            "tempo": tempo
+            "note_count": stats["note_count"],
+            "duration": format_duration_ms(stats["duration"]),
+            "duration_seconds": stats["duration"],
+            "tempo": tempo,
+            "density": stats["density"],
+            "notes_per_second": stats["note_count"] / stats["duration"] if stats["duration"] else 0.0,
+            "max_chord": stats["max_chord"],
+            "peak_keys_per_second": stats["peak_keys_per_second"],
+            "shifted_share": stats["shifted_share"],
+            "analysis_ms": (time.perf_counter() - start) * 1000,
         }
+        with analytics_lock:
+            analytics_cache[key] = result
+            while len(analytics_cache) > ANALYTICS_CACHE_ENTRIES:
+                analytics_cache.popitem(last=False)
+        return result
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
@@ -1454,21 +4453,56 @@ def show_midi_info(event=None):
             midi_info_label.config(text="No file selected")
         return
     
-    midi_folder = get_midi_directory()
-    midi_files = [f for f in os.listdir(midi_folder) if f.lower().endswith('.mid')]
-    if not midi_files:
+    if selection[0] >= len(current_midi_files):
         return
         
-    selected_file = midi_files[selection[0]]
-    file_path = os.path.join(midi_folder, selected_file)
+    selected_file = current_midi_files[selection[0]]
+    file_path = os.path.join(get_midi_directory(), selected_file)
     
+    info = cached_midi_info(file_path)
+    if info is not None:
+        display_midi_info(selected_file, info)
+        return
+
     if status_label:
         status_label.config(text=f"Getting info for: {selected_file}")
-        
-    info = get_midi_info(file_path)
-    
+    if midi_info_label:
+        midi_info_label.config(text="Analyzing...")
+    start_midi_info_job(file_path, selected_file)
+
+def start_midi_info_job(file_path, selected_file):
+    """Parse and analyze a file on a MidiLoadJob thread and show the result if it is still wanted.
+
+    The parsed song lands in the song store, so loading it afterwards is instant.
+    """
+    global midi_info_job
+    if midi_info_job:
+        midi_info_job.cancel()
+    job = midi_info_job = MidiLoadJob(file_path, save_session=False)
+
+    def work():
+        job.run()
+        if job.cancelled:
+            return
+        if job.result is not None:
+            info = get_midi_info(job.result[0])
+        else:
+            info = {"status": "error", "message": job.error or "Failed to process the MIDI file"}
+        post_ui_call("midi_info", show_midi_info_result, job, selected_file, info)
+
+    threading.Thread(target=work, daemon=True).start()
+
+def show_midi_info_result(job, selected_file, info):
+    """Show a finished info job unless another file was selected meanwhile. Runs on the Tk thread."""
+    if job is midi_info_job:
+        display_midi_info(selected_file, info)
+
+def display_midi_info(selected_file, info):
+    """Fill the MIDI info panel and status bar from a get_midi_info result."""
     if info["status"] == "success":
-        info_text = f"Notes: {info['note_count']} | Duration: {info['duration']} | Tempo: {info['tempo']}"
+        info_text = (f"Notes: {info['note_count']} | Duration: {info['duration']} | Tempo: {info['tempo']} | "
+                     f"{info['notes_per_second']:.1f} notes/s | Max chord: {info['max_chord']} | "
+                     f"Peak: {info['peak_keys_per_second']} keys/s | Shifted: {info['shifted_share']:.0%}")
         if midi_info_label:
             midi_info_label.config(text=info_text)
         if status_label:
@@ -1483,8 +4517,18 @@ current_midi_files = []
 
 # --- Main Function ---
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     print("[Debug] Script started in __main__.")
     
+    if "--profile" in sys.argv[1:]:
+        start_profiling()
+    if "--low-jitter" in sys.argv[1:]:
+        LOW_JITTER_MODE = True
+    if "--control-socket" in sys.argv[1:]:
+        position = sys.argv.index("--control-socket") + 1
+        socket_path = sys.argv[position] if position < len(sys.argv) and not sys.argv[position].startswith("--") else None
+        start_control_server(socket_path)
+    
     app_data_dir = get_app_data_dir()
     midi_dir = get_midi_directory()
     temp_dir = get_temp_directory()
@@ -1503,17 +4547,25 @@ if __name__ == "__main__":
                     print(f"[Debug] Migrating {file} from legacy midi directory")
                     shutil.copy2(src_file, dest_file)
     
-    song_file = os.path.join(temp_dir, "song.json")
-    sheet_file = os.path.join(temp_dir, "sheetConversion.json")
-    if os.path.exists(song_file) and os.path.exists(sheet_file):
+    last_session_dir = find_last_session_song()
+    prune_session_directories(keep=last_session_dir)
+    if last_session_dir:
         try:
-            infoTuple = process_midi_file()
-            if infoTuple:
-                infoTuple[2] = parse_midi_info()
+            info = process_midi_file(last_session_dir)
+            if info:
+                info[2] = parse_midi_info(info)
+                player.load(info)
+                apply_keystroke_limit()
                 print("[Debug] Found existing song data, will be available for autoplay.")
         except Exception as e:
             print(f"[Debug] Error reading existing song data: {e}")
     
+    if "--daemon" in sys.argv[1:]:
+        daemon_files = list(itertools.takewhile(lambda arg: not arg.startswith("--"),
+                                                sys.argv[sys.argv.index("--daemon") + 1:]))
+        run_daemon(daemon_files)
+        sys.exit(0)
+
     original_play_next_note_action = play_next_note_action
     def play_next_note_action_wrapper():
         print("[Debug] play_next_note_action: Called.")